@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+from hashlib import sha256
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO
+
+from telethon.tl import types
+
+from ..database import SQLite
+from ..utils import get_work_dir, logging
+
+logger = logging()
+
+CAPACITY = 1024 * 1024 * 1024 # байт на диске, старые файлы вытесняются
+CHUNK = 512 * 1024
+
+
+def media_size(media: types.Photo | types.Document) -> int:
+    """Get size of the file which is downloaded for the media."""
+    if isinstance(media, types.Document):
+        return media.size
+    size = 0
+    for photo_size in media.sizes + (media.video_sizes or []):
+        size = max(
+            size,
+            getattr(photo_size, "size", 0),
+            *getattr(photo_size, "sizes", [0])
+        )
+    return size
+
+
+class MediaCache:
+    """
+    Content-addressed cache of downloaded media in the work directory.
+    Files are named by their sha256, the index maps the Telegram file id
+    and size to the hash. The least recently used files are evicted when
+    the cache grows over the capacity.
+    """
+    def __init__(self, capacity: int = CAPACITY) -> None:
+        self.database = SQLite()
+        self.capacity = capacity
+        self.directory = os.path.join(get_work_dir(), "cache")
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        """Get path of the cached file."""
+        return os.path.join(self.directory, digest)
+
+    def open(
+        self, media: types.Photo | types.Document
+    ) -> tuple[BinaryIO, int] | None:
+        """Open the cached file of the media if there is one."""
+        cached = self.database.get_cached_media(
+            media.id, media_size(media), time.time()
+        )
+        if cached is None:
+            return None
+        digest, length = cached
+        try:
+            return open(self.path(digest), "rb"), length
+        except OSError as error:
+            logger.warning(error)
+            return None
+
+    def copy(self, file: BinaryIO) -> tuple[str, int]:
+        """
+        Copy the file to the cache, rewind it and return its sha256 and
+        size. A partial copy is removed.
+        """
+        digest = sha256()
+        length = 0
+        try:
+            with NamedTemporaryFile(dir=self.directory, delete=False) as copy:
+                try:
+                    while chunk := file.read(CHUNK):
+                        digest.update(chunk)
+                        copy.write(chunk)
+                        length += len(chunk)
+                except BaseException:
+                    copy.close()
+                    os.remove(copy.name)
+                    raise
+            os.replace(copy.name, self.path(digest.hexdigest()))
+        finally:
+            if not file.closed:
+                file.seek(0)
+        return digest.hexdigest(), length
+
+    async def store(
+        self, media: types.Photo | types.Document, file: BinaryIO
+    ) -> None:
+        """
+        Copy the downloaded file to the cache. Hashing and copying of large
+        files run in a thread to not block the event loop.
+        """
+        try:
+            digest, length = await asyncio.to_thread(self.copy, file)
+        except OSError as error:
+            logger.warning(error)
+            return
+        self.database.add_cached_media(
+            media.id, media_size(media), digest, length, time.time()
+        )
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used files over the capacity."""
+        while self.database.get_media_cache_size() > self.capacity:
+            popped = self.database.pop_cached_media()
+            if popped is None:
+                return
+            digest, unused = popped
+            if unused:
+                try:
+                    os.remove(self.path(digest))
+                except OSError as error:
+                    logger.warning(error)
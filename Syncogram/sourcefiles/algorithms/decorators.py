@@ -1,17 +1,28 @@
+from functools import wraps
 from typing import Coroutine
-from ..telegram import UserClient
-from ..database import SQLite
 
-database = SQLite()
+from ..telegram import ClientPool
+
 
 def autoconnect(func: Coroutine):
-    """Decorator got token and connect user to server."""
-    async def wrapper(*args):
-        sender: UserClient = UserClient(database.get_session_by_status(1))
-        recepient: UserClient = UserClient(database.get_session_by_status(0))
-        if not sender.is_connected():
-            await sender.connect()
-        if not recepient.is_connected():
-            await recepient.connect()
-        return await func(*args, sender=sender, recepient=recepient)
-    return wrapper
\ No newline at end of file
+    """
+    Decorator takes the connected sender and recepient with their dialog
+    snapshots from the run pool and releases them when the algorithm ends
+    or is cancelled.
+    """
+    @wraps(func)
+    async def wrapper(*args, pool: ClientPool | None = None):
+        pool = pool if pool is not None else ClientPool()
+        sender, recepient = await pool.acquire()
+        sender_dialogs, recepient_dialogs = pool.snapshots
+        try:
+            return await func(
+                *args,
+                sender=sender,
+                recepient=recepient,
+                sender_dialogs=sender_dialogs,
+                recepient_dialogs=recepient_dialogs
+            )
+        finally:
+            await pool.release()
+    return wrapper
@@ -0,0 +1,32 @@
+from functools import partial
+
+from telethon import errors
+
+from .executor import execute
+from ..components import Task
+from ..telegram import DialogSnapshot, UserClient
+from ..utils import logging
+
+logger = logging()
+
+
+async def load_dialogs(
+    client: UserClient, snapshot: DialogSnapshot, ui: Task
+) -> DialogSnapshot | None:
+    """
+    Load the dialog snapshot of the account once per run. None is returned
+    if the dialogs can't be fetched, the algorithm decides how to go on.
+    """
+    try:
+        return await snapshot.load(
+            partial(execute, client, client.get_dialogs, ui)
+        )
+    except (
+        errors.InputConstructorInvalidError,
+        errors.OffsetPeerIdInvalidError,
+        errors.SessionPasswordNeededError,
+        errors.TimeoutError
+    ) as error:
+        logger.critical(error)
+        ui.message(f"It is not possible to get a list of dialogs: {error}")
+        return None
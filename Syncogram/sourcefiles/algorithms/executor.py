@@ -0,0 +1,71 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable
+
+from telethon import errors
+from telethon.tl.tlobject import TLRequest
+
+from ..components import Task
+from ..telegram import UserClient
+from ..utils import logging
+
+logger = logging()
+
+ATTEMPTS = 5
+BACKOFF = 2
+TRANSIENT = (
+    ConnectionError,
+    asyncio.TimeoutError,
+    errors.ServerError,
+    errors.TimedOutError,
+)
+
+
+async def execute(
+    client: UserClient,
+    request: TLRequest | Callable[[], Awaitable[Any]],
+    ui: Task,
+    idempotent: bool = True
+) -> Any:
+    """
+    Send the request by the client and retry it until it succeeds.
+    FloodWait and other flood errors with a pause are waited out with a
+    jitter, transient network and server errors are retried with
+    exponential backoff, any other error is permanent and raised to the
+    algorithm. A request which creates something new is not idempotent:
+    the server may have applied it before the connection failed, so it
+    is never retried after a transient error, the journal resumes it.
+    """
+    attempt = 0
+    while True:
+        try:
+            if isinstance(request, TLRequest):
+                return await client(request)
+            return await request()
+        except errors.FloodError as flood:
+            if getattr(flood, "seconds", None) is None:
+                client.retries["permanent"] += 1
+                raise
+            client.retries["flood"] += 1
+            logger.warning(flood)
+            ui.message(flood)
+            ui.cooldown(flood)
+            await asyncio.sleep(
+                flood.seconds + random.uniform(0, max(1, flood.seconds / 10))
+            )
+            ui.uncooldown()
+        except TRANSIENT as error:
+            attempt += 1
+            client.retries["transient"] += 1
+            if not idempotent:
+                logger.error(f"{error}. The request is not retried.")
+                raise
+            if attempt >= ATTEMPTS:
+                logger.error(f"{error}. Retries limit was reached.")
+                raise
+            delay = BACKOFF ** attempt + random.uniform(0, 1)
+            logger.warning(f"{error}. Retry in {delay:.1f}s.")
+            await asyncio.sleep(delay)
+        except errors.RPCError:
+            client.retries["permanent"] += 1
+            raise
@@ -0,0 +1,215 @@
+from sys import intern
+
+from telethon.tl import patched, types
+
+MAX_BATCH = 100
+
+
+class Record:
+    """
+    Compact plan record of a saved message. The stream is projected into
+    records, full messages are fetched only when they are forwarded.
+    """
+    __slots__ = (
+        "id",
+        "grouped_id",
+        "reply_to_msg_id",
+        "pinned",
+        "has_text",
+        "media",
+        "media_id",
+        "size"
+    )
+
+    def __init__(
+        self,
+        id: int,
+        grouped_id: int | None,
+        reply_to_msg_id: int | None,
+        pinned: bool,
+        has_text: bool,
+        media: str | None,
+        media_id: int | None = None,
+        size: int = 0
+    ) -> None:
+        self.id = id
+        self.grouped_id = grouped_id
+        self.reply_to_msg_id = reply_to_msg_id
+        self.pinned = pinned
+        self.has_text = has_text
+        self.media = media
+        self.media_id = media_id
+        self.size = size
+
+    @classmethod
+    def from_message(cls, message: patched.Message) -> "Record":
+        """Project the message into the record."""
+        reply = message.reply_to
+        reply_to_msg_id = None
+        if reply is not None and not getattr(reply, "reply_to_peer_id", None):
+            reply_to_msg_id = getattr(reply, "reply_to_msg_id", None)
+        media = media_id = None
+        size = 0
+        if message.media is not None:
+            media = intern(type(message.media).__name__)
+            document = getattr(message.media, "document", None)
+            photo = getattr(message.media, "photo", None)
+            if isinstance(document, types.Document):
+                media_id, size = document.id, document.size
+            elif isinstance(photo, types.Photo):
+                media_id = photo.id
+                for photo_size in photo.sizes:
+                    size = max(
+                        size,
+                        getattr(photo_size, "size", 0),
+                        *getattr(photo_size, "sizes", [0])
+                    )
+        return cls(
+            message.id,
+            message.grouped_id,
+            reply_to_msg_id,
+            bool(message.pinned),
+            bool(message.message),
+            media,
+            media_id,
+            size
+        )
+
+
+class MediaIndex:
+    """
+    Index of media transferred for the pair, keyed by the file id and its
+    size. A media-only message whose media is already known is collapsed
+    to a reference to the copy instead of being forwarded again. Media
+    is indexed only after its message was mapped to the copy.
+    """
+    def __init__(self, known: dict[tuple[int, int], int]) -> None:
+        self.known: dict[tuple[int, int], int] = known
+        self.skipped: int = 0
+        self.bytes: int = 0
+
+    def original(self, record: Record) -> int | None:
+        """Get id of the mapped message with the same media."""
+        if record.media_id is None or record.has_text or record.pinned \
+            or record.grouped_id is not None \
+                or record.reply_to_msg_id is not None:
+            return None
+        original = self.known.get((record.media_id, record.size))
+        if original is None or original == record.id:
+            return None
+        self.skipped += 1
+        self.bytes += record.size
+        return original
+
+    def register(self, record: Record) -> None:
+        """Index media of the message which was mapped to the copy."""
+        if record.media_id is not None:
+            self.known.setdefault((record.media_id, record.size), record.id)
+
+    def restore(self, record: Record) -> None:
+        """Count the collapsed record back when it has to be forwarded."""
+        self.skipped -= 1
+        self.bytes -= record.size
+
+    @property
+    def requests(self) -> int:
+        """Least count of forward requests which were not sent."""
+        return self.skipped // MAX_BATCH * 2
+
+
+class Segment:
+    """Messages which the recepient copies to the saved chat in one request."""
+    def __init__(self, reply_to: int | None = None) -> None:
+        self.reply_to: int | None = reply_to
+        self.messages: list[Record] = []
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    @property
+    def is_reply(self) -> bool:
+        """Segment must be sent as a reply to the mapped target."""
+        return self.reply_to is not None
+
+
+class Batch:
+    """
+    Messages which the sender stages in one forward. The batch is split
+    into ordered segments: runs of plain messages and replies.
+    """
+    def __init__(self) -> None:
+        self.segments: list[Segment] = []
+        self.messages: list[Record] = []
+        self.staged: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def append(
+        self, item: list[Record], reply_to: int | None
+    ) -> None:
+        """Add the item to the last plain segment or open a reply one."""
+        if reply_to is not None or not self.segments \
+            or self.segments[-1].is_reply:
+            self.segments.append(Segment(reply_to))
+        self.segments[-1].messages.extend(item)
+        self.messages.extend(item)
+
+
+class Planner:
+    """
+    Planner of the favorites forward batches. It follows the reply edges
+    of the stream: a reply opens its own segment only if its target is
+    already mapped or planned before it, replies to unknown messages are
+    forwarded as plain ones. Albums are packed as atomic items, so every
+    batch is filled up to the limit of one forward request.
+    """
+    def __init__(self, mapped: dict[int, int]) -> None:
+        self.mapped: dict[int, int] = mapped
+        self.planned: set[int] = set()
+        self.batch: Batch = Batch()
+        self.item: list[Record] = []
+
+    def target(self, record: Record) -> int | None:
+        """Get the reply target of the record if it can be resolved."""
+        target = record.reply_to_msg_id
+        if target is None:
+            return None
+        if target in self.planned or target in self.mapped:
+            return target
+        return None
+
+    def skip(self, record: Record) -> None:
+        """Plan the record without sending, replies to it are resolvable."""
+        self.planned.add(record.id)
+
+    def place(self) -> Batch | None:
+        """
+        Put the pending item (an album or a single message) to the batch.
+        Albums are never split: if the item does not fit, the full batch
+        is returned and the item opens the next one.
+        """
+        if not self.item:
+            return None
+        ready: Batch | None = None
+        if len(self.batch) + len(self.item) > MAX_BATCH:
+            ready, self.batch = self.batch, Batch()
+        self.batch.append(self.item, self.target(self.item[0]))
+        self.planned.update(record.id for record in self.item)
+        self.item = []
+        return ready
+
+    def feed(self, record: Record) -> Batch | None:
+        """Plan the record, return the previous batch when it is full."""
+        ready: Batch | None = None
+        grouped_id = self.item[-1].grouped_id if self.item else None
+        if record.grouped_id is None or record.grouped_id != grouped_id:
+            ready = self.place()
+        self.item.append(record)
+        return ready
+
+    def flush(self) -> list[Batch]:
+        """Return the batches which are left after the end of the stream."""
+        ready = [self.place(), self.batch]
+        self.batch = Batch()
+        return [batch for batch in ready if batch is not None and batch.messages]
@@ -0,0 +1,77 @@
+import struct
+import time
+from typing import Iterable
+
+from telethon.errors import TypeNotFoundError
+from telethon.extensions import BinaryReader
+from telethon.tl import types
+from telethon.tl.tlobject import TLObject, TLRequest
+
+from .executor import execute
+from ..components import Task
+from ..database import SQLite
+from ..telegram import UserClient
+from ..utils import logging
+
+logger = logging()
+database = SQLite()
+
+MASK = (1 << 64) - 1
+
+
+def telegram_hash(ids: Iterable[int]) -> int:
+    """Telegram's hash of the list of ids used for caching of results."""
+    acc = 0
+    for i in ids:
+        acc ^= acc >> 21
+        acc ^= (acc << 35) & MASK
+        acc ^= acc >> 4
+        acc = (acc + i) & MASK
+    return acc - (1 << 64) if acc >> 63 else acc
+
+
+def result_hash(result: TLObject) -> int:
+    """Get the hash of the result which is sent with the next request."""
+    if isinstance(result, types.contacts.Contacts):
+        return telegram_hash([
+            result.saved_count,
+            *sorted(contact.user_id for contact in result.contacts)
+        ])
+    return getattr(result, "hash", 0)
+
+
+async def fetch(
+    client: UserClient,
+    request: type[TLRequest],
+    ui: Task,
+    ttl: float | None = None
+) -> TLObject:
+    """
+    Send the request with the hash of the stored result of the account.
+    If Telegram answers that nothing was modified, the stored result is
+    returned. Results older than <ttl> seconds are requested again.
+    """
+    me: types.InputPeerUser = await client.get_me(input_peer=True)
+    method = request.__name__
+    stored: TLObject | None = None
+    stored_hash = 0
+    response = database.get_response(me.user_id, method)
+    if response is not None:
+        stored_hash, blob, updated = response
+        if ttl is None or time.time() - updated < ttl:
+            try:
+                stored = BinaryReader(blob).tgread_object()
+            except (TypeNotFoundError, BufferError, struct.error) as error:
+                logger.warning(f"Stored {method} is not readable: {error}")
+                stored, stored_hash = None, 0
+        else:
+            stored_hash = 0
+
+    result = await execute(client, request(stored_hash), ui)
+    if type(result).__name__.endswith("NotModified") and stored is not None:
+        logger.info(f"{method} was not modified, the stored result is used.")
+        return stored
+    database.set_response(
+        me.user_id, method, result_hash(result), bytes(result), time.time()
+    )
+    return result
@@ -1,16 +1,26 @@
 import asyncio
+from collections import deque
 from datetime import datetime
+from functools import partial
+from itertools import islice
+from typing import BinaryIO
 
 from telethon import errors
 from telethon.tl.functions import users, photos
 from telethon.tl import types
 
 from ..components import Task
+from ..database import SQLite
 from ..telegram import UserClient
 from ..utils import logging
 from .decorators import autoconnect
+from .executor import execute
+from .transfer import spool, upload
 
 logger = logging()
+database = SQLite()
+
+PREFETCH = 3
 
 @logger.catch()
 @autoconnect
@@ -24,133 +34,138 @@ async def sync_profile_avatars(ui: Task, **kwargs) -> None:
     recepient: UserClient = kwargs["recepient"]
 
     try:
-        avatars = await sender.get_profile_photos("me")
+        avatars = await execute(
+            sender, partial(sender.get_profile_photos, "me"), ui
+        )
     except (errors.MaxIdInvalidError, errors.UserIdInvalidError) as error:
         logger.critical(error)
         ui.unsuccess(error)
         ui.message(error)
         return
 
+    fallback: types.Photo | None = None
     try:
-        user: types.users.UserFull = await sender(
-            users.GetFullUserRequest('me')
+        user: types.users.UserFull = await execute(
+            sender, users.GetFullUserRequest('me'), ui
         )
         fallback = user.full_user.fallback_photo
     except (errors.TimedOutError, errors.UserIdInvalidError) as error:
         logger.warning(error)
         ui.message(error, True)
 
+    # Аватары, которые уже были перенесены и есть у получателя
+    pair = (database.get_user_id_by_status(1), database.get_user_id_by_status(0))
+    transferred: dict[int, int] = database.get_avatars_ids(*pair)
+    present: dict[int, types.Photo] = {}
+    if transferred:
+        recepient_avatars = await execute(
+            recepient, partial(recepient.get_profile_photos, "me"), ui
+        )
+        present.update((photo.id, photo) for photo in recepient_avatars)
+        recepient_user: types.users.UserFull = await execute(
+            recepient, users.GetFullUserRequest('me'), ui
+        )
+        recepient_fallback = recepient_user.full_user.fallback_photo
+        if isinstance(recepient_fallback, types.Photo):
+            present[recepient_fallback.id] = recepient_fallback
+
     ui.progress_counters.visible = True
-    ui.total = avatars.total
+    ui.total = avatars.total + bool(fallback)
 
-    timeout = 3 if avatars.total < 45 else 5
     image_extension = ".jpeg"
     video_extension = ".mp4"
 
-    photo: types.Photo
-    for photo in reversed(avatars):
-        while True:
-            try:
-                await asyncio.sleep(timeout)
-                blob = await sender.download_media(photo, bytes)
-                break
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.cooldown(flood)
-                ui.message(flood)
-                timeout += 5
-                await asyncio.sleep(flood.seconds)
-                ui.uncooldown()
-
+    async def sync_avatar(
+        photo: types.Photo,
+        file: BinaryIO,
+        size: int,
+        **kwargs
+    ) -> bool:
+        video = bool(photo.video_sizes)
         name = "Syncogram_" + datetime.strftime(
             photo.date, "%Y_%m_%d_%H_%M_%S"
+        ) + (video_extension if video else image_extension)
+        try:
+            uploaded = await upload(recepient, file, size, name, ui)
+            result: types.photos.Photo = await execute(
+                recepient,
+                photos.UploadProfilePhotoRequest(
+                    file=uploaded if not video else None,
+                    video=uploaded if video else None,
+                    **kwargs
+                ),
+                ui,
+                idempotent=False
+            )
+            database.add_avatar_id(*pair, photo.id, result.photo.id)
+            ui.value += 1
+            return True
+        except (
+            errors.FilePartsInvalidError,
+            errors.ImageProcessFailedError,
+            errors.PhotoCropSizeSmallError,
+            errors.PhotoExtInvalidError,
+            errors.StickerMimeInvalidError,
+            errors.VideoFileInvalidError
+        ) as error:
+            logger.error(error)
+            logger.info(photo.stringify())
+            ui.message(error, True)
+            return False
+
+    async def raise_avatar(photo: types.Photo, **kwargs) -> None:
+        """Move the avatar the recepient already has to the front."""
+        await execute(
+            recepient,
+            photos.UpdateProfilePhotoRequest(
+                id=types.InputPhoto(
+                    id=photo.id,
+                    access_hash=photo.access_hash,
+                    file_reference=photo.file_reference
+                ),
+                **kwargs
+            ),
+            ui
         )
-        while True:
-            try:
-                await recepient(
-                    photos.UploadProfilePhotoRequest(
-                        file=await recepient.upload_file(
-                            blob,
-                            file_name=name + image_extension
-                        ) if not photo.video_sizes else None,
-                        video=await recepient.upload_file(
-                            blob,
-                            file_name=name + video_extension
-                        ) if photo.video_sizes else None
-                    )
-                )
-                ui.value += 1
-                break
-            except (
-                errors.FilePartsInvalidError,
-                errors.ImageProcessFailedError,
-                errors.PhotoCropSizeSmallError,
-                errors.PhotoExtInvalidError,
-                errors.StickerMimeInvalidError,
-                errors.VideoFileInvalidError
-            ) as error:
-                logger.error(error)
-                logger.info(photo.stringify())
-                ui.message(error, True)
-                break
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.cooldown(flood)
-                ui.message(flood)
-                timeout += 5
-                await asyncio.sleep(flood.seconds)
-                ui.uncooldown()
 
+    queue: list[tuple[types.Photo, dict]] = [
+        (photo, {}) for photo in reversed(avatars)
+    ]
     if fallback:
-        while True:
-            try:
-                blob = await sender.download_media(fallback, bytes)
-                break
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.cooldown(flood)
-                ui.message(flood)
-                timeout += 5
-                await asyncio.sleep(flood.seconds)
-                ui.uncooldown()
+        queue.append((fallback, {"fallback": True}))
 
-        name = "Syncogram_" + datetime.strftime(
-            photo.date, "%Y_%m_%d_%H_%M_%S"
-        )
-        while True:
-            try:
-                await recepient(
-                    photos.UploadProfilePhotoRequest(
-                        fallback=True,
-                        file=await recepient.upload_file(
-                            blob,
-                            file_name=name + image_extension
-                        ) if not fallback.video_sizes else None,
-                        video=await recepient.upload_file(
-                            blob,
-                            file_name=name + video_extension
-                        ) if fallback.video_sizes else None
-                    )
-                )
+    # Отправитель скачивает до PREFETCH недостающих аватаров вперед,
+    # получатель загружает их строго по порядку.
+    missing = iter(
+        (photo, options) for photo, options in queue
+        if transferred.get(photo.id) not in present
+    )
+    pending: deque[asyncio.Task] = deque()
+
+    def prefetch() -> None:
+        for photo, _ in islice(missing, PREFETCH - len(pending)):
+            pending.append(asyncio.create_task(spool(sender, photo, ui)))
+
+    uploaded = False
+    try:
+        prefetch()
+        for photo, options in queue:
+            existing = present.get(transferred.get(photo.id))
+            if existing is not None:
+                # Загруженный ранее аватар перестал быть последним
+                if uploaded and not options:
+                    await raise_avatar(existing)
                 ui.value += 1
-                break
-            except (
-                errors.FilePartsInvalidError,
-                errors.ImageProcessFailedError,
-                errors.PhotoCropSizeSmallError,
-                errors.PhotoExtInvalidError,
-                errors.StickerMimeInvalidError,
-                errors.VideoFileInvalidError
-            ) as error:
-                logger.error(error)
-                logger.info(photo.stringify())
-                ui.message(error, True)
-                break
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.cooldown(flood)
-                ui.message(flood)
-                timeout += 5
-                await asyncio.sleep(flood.seconds)
-                ui.uncooldown()
+                continue
+            task = pending.popleft()
+            prefetch()
+            file, size = await task
+            with file:
+                uploaded |= await sync_avatar(photo, file, size, **options)
+    finally:
+        for task in pending:
+            task.cancel()
+            if task.done() and not task.cancelled() \
+                and task.exception() is None:
+                task.result()[0].close()
     ui.success()
@@ -1,13 +1,13 @@
-import asyncio
-from typing import Any
+from functools import partial
 
 from telethon import errors
 from telethon.tl import types
 from telethon.tl.functions import contacts
 
 from .decorators import autoconnect
+from .executor import execute
 from ..components import Task
-from ..telegram import UserClient
+from ..telegram import DialogSnapshot, UserClient
 from ..utils import logging
 
 logger = logging()
@@ -18,23 +18,16 @@ async def sync_blacklist(ui: Task, **kwargs):
     """The algorithm for synchronizing blacklist."""
     async def get_blocked(client: UserClient) -> list[types.User]:
         source: list[types.User] = []
-        while True:
-            try:
-                request: types.contacts.Blocked | types.contacts.BlockedSlice = \
-                    await client(
-                        contacts.GetBlockedRequest(
-                            offset=0,
-                            limit=1_000_000,
-                            my_stories_from=False
-                        )
-                    )
-                break
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.cooldown(flood)
-                ui.message(flood)
-                asyncio.sleep(flood.seconds)
-                ui.uncooldown()
+        request: types.contacts.Blocked | types.contacts.BlockedSlice = \
+            await execute(
+                client,
+                contacts.GetBlockedRequest(
+                    offset=0,
+                    limit=1_000_000,
+                    my_stories_from=False
+                ),
+                ui
+            )
         source.extend(request.users)
         return source
 
@@ -42,6 +35,7 @@ async def sync_blacklist(ui: Task, **kwargs):
 
     sender: UserClient = kwargs["sender"]
     recepient: UserClient = kwargs["recepient"]
+    recepient_dialogs: DialogSnapshot = kwargs["recepient_dialogs"]
 
     sender_blacklist: list[types.User] = await get_blocked(sender)
     recepient_blacklist: list[types.User] = await get_blocked(recepient)
@@ -57,43 +51,29 @@ async def sync_blacklist(ui: Task, **kwargs):
                     recepient_blacklist.remove(r_blocked)
                     break
 
-    length = len(sender_blacklist)
-    if length <= 20:
-        timeout = 2.5
-    elif 20 <= length <= 50:
-        timeout = 5
-    else:
-        timeout = 10
-
-    ui.total = length
+    ui.total = len(sender_blacklist)
     ui.progress_counters.visible = True
 
     for blocked in sender_blacklist:
-        while True:
-            try:
-                await asyncio.sleep(timeout)
-                await recepient(
-                    contacts.BlockRequest(
-                        id=blocked.username or blocked.usernames[0].username,
-                        my_stories_from=False
-                    )
-                )
-                break
-            except errors.ContactIdInvalidError as error:
-                logger.error(error)
-                ui.message(
-                    f"Can't sync: @{
-                        blocked.username or blocked.usernames[0].username
-                        }", True
-                )
-                break
-            except (errors.FloodWaitError) as flood:
-                logger.warning(flood)
-                ui.cooldown(flood)
-                ui.message(flood)
-                timeout += 5
-                asyncio.sleep(flood.seconds)
-                ui.uncooldown()
+        username = blocked.username or blocked.usernames[0].username
+        peer = await execute(
+            recepient, partial(recepient.peers.resolve, blocked), ui
+        )
+        if peer is None:
+            ui.message(f"Can't sync: @{username}", True)
+            ui.value += 1
+            continue
+        try:
+            await execute(
+                recepient,
+                contacts.BlockRequest(id=peer, my_stories_from=False),
+                ui
+            )
+            recepient_dialogs.block(blocked.id)
+        except errors.ContactIdInvalidError as error:
+            logger.error(error)
+            ui.message(f"Can't sync: @{username}", True)
+            recepient.peers.forget(blocked)
 
         ui.value += 1
     ui.success()
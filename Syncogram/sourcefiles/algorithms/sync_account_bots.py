@@ -1,13 +1,14 @@
-import asyncio
+from functools import partial
 
 from telethon import errors
 from telethon.tl import types
-from telethon.tl import custom
 from telethon.tl.functions import account
 
 from .decorators import autoconnect
+from .dialogs import load_dialogs
+from .executor import execute
 from ..components import Task
-from ..telegram import UserClient
+from ..telegram import DialogRecord, UserClient, rebind
 from ..utils import logging
 
 logger = logging()
@@ -17,104 +18,72 @@ logger = logging()
 @autoconnect
 async def sync_bots(ui: Task, **kwargs) -> None:
     """The algorithm for synchronizing bots in telegram."""
-    async def __get_dialogs(client: UserClient) -> None | list[custom.dialog.Dialog]:
-        while True:
-            try:
-                source: list[custom.dialog.Dialog] = await client.get_dialogs()
-                break
-            except (
-                errors.InputConstructorInvalidError,
-                errors.OffsetPeerIdInvalidError,
-                errors.SessionPasswordNeededError,
-                errors.TimeoutError
-            ) as error:
-                logger.critical(error)
-                ui.unsuccess("It is not possible to get a list of the sender's bots.")
-                ui.message("It is not possible to get a list of the sender's bots.")
-                return
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.cooldown(flood)
-                asyncio.sleep(flood.seconds)
-                ui.uncooldown()
-        return source
-
     ui.default()
 
     sender: UserClient = kwargs["sender"]
     recepient: UserClient = kwargs["recepient"]
 
-    sender_dialogs: list[custom.dialog.Dialog] = await __get_dialogs(sender)
+    sender_dialogs = await load_dialogs(sender, kwargs["sender_dialogs"], ui)
     if sender_dialogs is None:
+        ui.unsuccess()
         return
-    recepient_dialogs: list[custom.dialog.Dialog] = await __get_dialogs(recepient)
+    recepient_dialogs = await load_dialogs(
+        recepient, kwargs["recepient_dialogs"], ui
+    )
 
-    s_dialog: custom.dialog.Dialog
-    for s_dialog in sender_dialogs.copy():
-        if not isinstance(s_dialog.entity, types.User):
-            sender_dialogs.remove(s_dialog)
-        elif not s_dialog.entity.bot:
-            sender_dialogs.remove(s_dialog)
-        elif s_dialog.entity.username == "replies":
-            sender_dialogs.remove(s_dialog)
-        else:
-            if recepient_dialogs is not None:
-                for r_dialog in recepient_dialogs:
-                    if s_dialog.entity.id == r_dialog.entity.id:
-                        sender_dialogs.remove(s_dialog)
+    bots: list[DialogRecord] = [
+        bot for bot in sender_dialogs.kinds("bot")
+        if bot.entity.username != "replies"
+        and (recepient_dialogs is None or bot.id not in recepient_dialogs)
+    ]
 
     ui.progress_counters.visible = True
-    ui.total = len(sender_dialogs)
+    ui.total = len(bots)
 
-    timeout = 5 if ui.total < 50 else 10
-    timeout_additional = 2.5
-
-    bot: custom.dialog.Dialog
-    for bot in sender_dialogs:
+    bot: DialogRecord
+    for bot in bots:
         entity: types.User = bot.entity
-        dialog: types.Dialog = bot.dialog
-        while True:
-            try:
-                await asyncio.sleep(timeout_additional)
-                await recepient(account.UpdateNotifySettingsRequest(
-                    peer=entity.username,
+        notify_settings: types.PeerNotifySettings = bot.notify_settings
+        peer = await execute(
+            recepient, partial(recepient.peers.resolve, entity), ui
+        )
+        if peer is None:
+            ui.message(f"Unable to sync: @{entity.username or entity.usernames[0].username}", True)
+            continue
+        try:
+            await execute(
+                recepient,
+                account.UpdateNotifySettingsRequest(
+                    peer=peer,
                     settings=types.InputPeerNotifySettings(
-                        show_previews=dialog.notify_settings.show_previews,
-                        mute_until=dialog.notify_settings.mute_until,
+                        show_previews=notify_settings.show_previews,
+                        mute_until=notify_settings.mute_until,
                         sound=types.NotificationSoundDefault(),
-                        stories_muted=dialog.notify_settings.stories_muted,
-                        stories_hide_sender=dialog.notify_settings.stories_hide_sender,
+                        stories_muted=notify_settings.stories_muted,
+                        stories_hide_sender=notify_settings.stories_hide_sender,
                         stories_sound=types.NotificationSoundDefault()
                     )
-                ))
-                break
-            except errors.PeerIdInvalidError as error:
-                logger.warning(error)
-                ui.message(f"Failed to sync notification settings for: @{entity.username or entity.usernames[0].username}", True)
-                break
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.message(flood)
-                ui.cooldown(flood)
-                timeout_additional += 5
-                await asyncio.sleep(flood.seconds)
-                ui.uncooldown()
+                ),
+                ui
+            )
+        except errors.PeerIdInvalidError as error:
+            logger.warning(error)
+            ui.message(f"Failed to sync notification settings for: @{entity.username or entity.usernames[0].username}", True)
 
-        while True:
-            try:
-                await asyncio.sleep(timeout)
-                await recepient.send_message(entity.username, "/start")
-                ui.value += 1
-                break
-            except (errors.YouBlockedUserError, errors.UserIsBlockedError) as error:
-                logger.error(error)
-                ui.message(f"Unable to sync: @{entity.username or entity.usernames[0].username}", True)
-                break
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.cooldown(flood)
-                timeout += 5
-                asyncio.sleep(flood.seconds)
-                ui.uncooldown()
+        try:
+            await execute(
+                recepient,
+                partial(recepient.send_message, peer, "/start"),
+                ui,
+                idempotent=False
+            )
+            if recepient_dialogs is not None:
+                recepient_dialogs.add(
+                    rebind(entity, peer), notify_settings=notify_settings
+                )
+            ui.value += 1
+        except (errors.YouBlockedUserError, errors.UserIsBlockedError) as error:
+            logger.error(error)
+            ui.message(f"Unable to sync: @{entity.username or entity.usernames[0].username}", True)
 
     ui.success()
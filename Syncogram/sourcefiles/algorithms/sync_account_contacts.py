@@ -1,16 +1,21 @@
-import asyncio
+from functools import partial
 
 from telethon import errors
 from telethon.tl import types
 from telethon.tl.functions import contacts
 
 from .decorators import autoconnect
+from .executor import execute
+from .responses import fetch
 from ..components import Task
 from ..telegram import UserClient
 from ..utils import logging
 
 logger = logging()
 
+USERS_TTL = 600 # хэш не учитывает имена и юзернеймы, поэтому список устаревает
+
+
 @logger.catch()
 @autoconnect
 async def sync_contacts(ui: Task, **kwargs) -> None:
@@ -19,18 +24,9 @@ async def sync_contacts(ui: Task, **kwargs) -> None:
     sender: UserClient = kwargs["sender"]
     recepient: UserClient = kwargs["recepient"]
 
-    while True:
-        try:
-            request: types.contacts.Contacts = await sender(
-                contacts.GetContactsRequest(0)
-            )
-            break
-        except errors.FloodWaitError as flood:
-            logger.warning(flood)
-            ui.message(flood)
-            ui.cooldown(flood)
-            await asyncio.sleep(flood.seconds)
-            ui.uncooldown()
+    request: types.contacts.Contacts = await fetch(
+        sender, contacts.GetContactsRequest, ui, USERS_TTL
+    )
 
     users: list[types.User] = request.users
     non_sync: list[str] = []
@@ -40,37 +36,32 @@ async def sync_contacts(ui: Task, **kwargs) -> None:
             users.remove(contact)
             non_sync.append(contact.first_name)
 
-    length = len(users)
-    timeout = 2.5 if length <= 20 else 5 if 20 < length <= 50 else 10
-    ui.total = length
+    ui.total = len(users)
     ui.progress_counters.visible = True
 
     for contact in users:
-        while True:
-            try:
-                await asyncio.sleep(timeout)
-                await recepient(
-                    contacts.AddContactRequest(
-                        id=contact.username or contact.usernames[0].username,
-                        first_name=contact.first_name or str(),
-                        last_name=contact.last_name or str(),
-                        phone=contact.phone or str(),
-                        add_phone_privacy_exception=True
-                    )
-                )
-                ui.value += 1
-                break
-            except errors.ContactNameEmptyError as error:
-                logger.error(error)
-                ui.message(error, True)
-                break
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.message(flood)
-                ui.cooldown(flood)
-                timeout += 5
-                await asyncio.sleep(flood.seconds)
-                ui.uncooldown()
+        peer = await execute(
+            recepient, partial(recepient.peers.resolve, contact), ui
+        )
+        if peer is None:
+            non_sync.append(contact.first_name)
+            continue
+        try:
+            await execute(
+                recepient,
+                contacts.AddContactRequest(
+                    id=peer,
+                    first_name=contact.first_name or str(),
+                    last_name=contact.last_name or str(),
+                    phone=contact.phone or str(),
+                    add_phone_privacy_exception=True
+                ),
+                ui
+            )
+            ui.value += 1
+        except errors.ContactNameEmptyError as error:
+            logger.error(error)
+            ui.message(error, True)
     if non_sync:
         ui.message(f"Contacts was not sync: {non_sync}")
 
@@ -1,17 +1,83 @@
 import asyncio
+from contextlib import aclosing
+from functools import partial
+from typing import AsyncIterator
 
-from telethon import errors
-from telethon.tl import patched
+from telethon import errors, utils
+from telethon.tl import patched, types
+from telethon.tl.functions import channels, messages
 from telethon.helpers import TotalList
 
 from .decorators import autoconnect
+from .executor import execute
+from .planner import Batch, MediaIndex, Planner, Record, Segment
 from ..components import Task
+from ..database import SQLite
 from ..telegram import UserClient
 from ..utils import logging
 
 logger = logging()
+database = SQLite()
+
+PAGE = 100
+LOOKAHEAD = 300
+PIPELINE = 2
+CLEANUP = 100
+DEDUP = False # не пересылать повторно уже перенесенные медиа (по желанию)
+BRIDGE = False # пересылать через временную супергруппу вместо чата с получателем (по желанию)
+
+
+async def iter_saved_messages(
+    client: UserClient, ui: Task, min_id: int = 0
+) -> AsyncIterator[patched.Message]:
+    """Stream the Saved Messages chat page by page, the oldest first."""
+    while True:
+        page: TotalList[patched.Message] = await execute(
+            client,
+            partial(
+                client.get_messages,
+                "me",
+                limit=PAGE,
+                min_id=min_id,
+                reverse=True
+            ),
+            ui
+        )
+        for message in page:
+            yield message
+        if len(page) < PAGE:
+            return
+        min_id = page[-1].id
+
+
+async def lookahead(iterator: AsyncIterator, size: int) -> AsyncIterator:
+    """
+    Read the iterator ahead in the background, at most <size> items are
+    kept in memory while the consumer is busy.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+    end = object()
+
+    async def produce() -> None:
+        # Конец отмечается только пока потребитель жив: отмененная задача
+        # не должна ждать места в очереди, которую уже никто не читает.
+        try:
+            async for item in iterator:
+                await queue.put(item)
+        except Exception:
+            await queue.put(end)
+            raise
+        await queue.put(end)
+
+    task = asyncio.create_task(produce())
+    try:
+        while (item := await queue.get()) is not end:
+            yield item
+        await task
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
 
-timeout: int = 0
 
 @logger.catch()
 @autoconnect
@@ -25,314 +91,426 @@ async def sync_favorite_messages(ui: Task, **kwargs):
     sender: UserClient = kwargs["sender"]
     recepient: UserClient = kwargs["recepient"]
 
-    source: TotalList[patched.Message] = await sender.get_messages(
-        "me", min_id=0, max_id=0, reverse=True
+    counter: TotalList[patched.Message] = await execute(
+        sender, partial(sender.get_messages, "me", limit=0), ui
     )
-    sender_entity = await sender.get_entity('me')
-    recepient_entity = await recepient.get_entity('me')
-
-    global timeout
-    timeout = source.total / 325
-    timeout = timeout if timeout <= 10 else 10
-
-    async def pin_messages():
-        if pinned:
-            pin_timeout = 1 if len(pinned) <= 10 else 3.5
-            for message in pinned.copy():
-                while True:
-                    try:
-                        pin_id = ids.get(message.id)
-                        pin_id = pin_id if pin_id is not None else 123
-                        await asyncio.sleep(pin_timeout)
-                        await recepient.pin_message(
-                            'me',
-                            pin_id
-                        )
-                        pinned.remove(message)
-                        break
-                    except errors.MessageIdInvalidError as e:
-                        logger.error(e)
-                        ui.message(e, True)
-                        break
-                    except errors.FloodWaitError as flood:
-                        logger.warning(flood)
-                        ui.message(flood)
-                        ui.cooldown(flood)
-                        pin_timeout += pin_timeout
-                        await asyncio.sleep(flood.seconds)
-                        ui.uncooldown()
-
-    async def merge_old_and_new_ids():
-        if will_forward:
-            for k, message in enumerate(will_forward):
-                ids.setdefault(
-                    message.id,
-                    was_saved[k].id
-                )
-        elif will_reply:
-            for k, message in enumerate(will_reply):
-                ids.setdefault(
-                    message.id,
-                    was_saved[k].id
+    sender_entity = await execute(sender, partial(sender.get_entity, 'me'), ui)
+    recepient_entity = await execute(
+        recepient, partial(recepient.get_entity, 'me'), ui
+    )
+    pair: tuple[int, int] = (sender_entity.id, recepient_entity.id)
+
+    async def pin_messages() -> None:
+        """
+        Replay pins of the whole run in the original order. Messages which
+        are not mapped or already pinned by the recepient are skipped.
+        """
+        pins = [
+            ids[old_id] for old_id in database.get_favorites_pins(*pair)
+            if old_id in ids
+        ]
+        if not pins:
+            return
+        already: list[patched.Message] = await execute(
+            recepient,
+            partial(
+                recepient.get_messages,
+                'me',
+                limit=None,
+                filter=types.InputMessagesFilterPinned
+            ),
+            ui
+        )
+        already_pinned = {message.id for message in already}
+
+        for pin_id in pins:
+            if pin_id in already_pinned:
+                continue
+            try:
+                await execute(
+                    recepient,
+                    partial(recepient.pin_message, 'me', pin_id, notify=False),
+                    ui
                 )
-    async def forward_messages_and_save_ids() -> None:
-        global timeout
-        if will_forward:
-            while True:
-                try:
-                    await asyncio.sleep(timeout)
-                    messages_to_recepient = await sender.forward_messages(
-                        recepient_entity.username,
-                        will_forward
-                    )
-                    will_delete.extend(messages_to_recepient)
-                    break
-                except (
-                    errors.MessageIdsEmptyError,
-                    errors.MessageIdInvalidError,
-                    errors.GroupedMediaInvalidError
-                ) as error:
-                    logger.error(error)
-                    ui.message(f"{error}. {len(will_forward)} messages wasn't sync.", True)
-                    will_forward.clear()
-                    return
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout = timeout + 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
-
-            while True:
-                try:
-                    get_messages_from_sender = await recepient.get_messages(
-                        sender_entity.username,
-                        limit=len(messages_to_recepient),
-                    )
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout = timeout + 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
-
-            while True:
-                try:
-                    await asyncio.sleep(timeout)
-                    send_to_saved_chat = await recepient.forward_messages(
-                        'me',
-                        get_messages_from_sender,
-                        drop_author=True
-                    )
-                    break
-                except (
-                    errors.MessageIdsEmptyError,
-                    errors.MessageIdInvalidError,
-                    errors.GroupedMediaInvalidError
-                ) as error:
-                    logger.error(error)
-                    ui.message(f"{error}. {len(get_messages_from_sender)} messages wasn't sync.", True)
-                    will_forward.clear()
-                    return
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout = timeout + 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
-
-                send_to_saved_chat = reversed(send_to_saved_chat)
-                was_saved.extend(send_to_saved_chat)
-                await merge_old_and_new_ids()
-                await pin_messages()
-                will_forward.clear()
-                was_saved.clear()
-
-    async def reply_message_and_save_ids() -> None:
-        global timeout
-        if will_reply:
-            while True:
-                try:
-                    await asyncio.sleep(timeout)
-                    messages_to_recepient = await sender.forward_messages(
-                        recepient_entity.username,
-                        will_reply
-                    )
-                    will_delete.extend(messages_to_recepient)
-                    break
-                except (
-                    errors.MessageIdsEmptyError,
-                    errors.MessageIdInvalidError,
-                    errors.GroupedMediaInvalidError
-                ) as error:
-                    logger.error(error)
-                    ui.message(f"{error}. {len(will_reply)} messages wasn't sync.", True)
-                    will_reply.clear()
-                    return
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout = timeout + 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
-
-            while True:
-                try:
-                    get_messages_from_sender = await recepient.get_messages(
-                        sender_entity.username,
-                        limit=len(messages_to_recepient),
-                    )
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout = timeout + 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
-
-                if get_messages_from_sender[-1].text == "":
-                    while True:
-                        try:
-                            await asyncio.sleep(timeout)
-                            send_to_saved_chat = await recepient.send_file(
-                                'me',
-                                file=get_messages_from_sender,
-                                reply_to=ids.get(will_reply[-1].reply_to_msg_id)
-                            )
-                            break
-                        except (
-                            errors.MultiMediaTooLongError,
-                            errors.EntityBoundsInvalidError
-                        ) as error:
-                            logger.error(error)
-                            ui.message(error, True)
-                            will_reply.clear()
-                            break
-                        except errors.FloodWaitError as flood:
-                            logger.warning(flood)
-                            ui.message(flood)
-                            ui.cooldown(flood)
-                            timeout = timeout + 5
-                            await asyncio.sleep(flood.seconds)
-                            ui.uncooldown()
-                else:
-                    while True:
-                        try:
-                            await asyncio.sleep(timeout)
-                            send_to_saved_chat = await recepient.send_message(
-                                'me',
-                                message=get_messages_from_sender[-1].text,
-                                reply_to=ids.get(will_reply[-1].reply_to_msg_id),
-                                file=get_messages_from_sender \
-                                    if len(get_messages_from_sender) > 1 else None
-                            )
-                            break
-                        except (
-                            errors.MsgIdInvalidError,
-                            errors.MessageEmptyError,
-                            errors.MessageTooLongError,
-                        ) as error:
-                            logger.error(error)
-                            ui.message(error, True)
-                            will_reply.clear()
-                            break
-                        except errors.FloodWaitError as flood:
-                            logger.warning(flood)
-                            ui.message(flood)
-                            ui.cooldown(flood)
-                            timeout = timeout + 5
-                            await asyncio.sleep(flood.seconds)
-                            ui.uncooldown()
-
-                if isinstance(send_to_saved_chat, list):
-                    send_to_saved_chat = reversed(send_to_saved_chat)
-                    was_saved.extend(send_to_saved_chat)
-                else:
-                    was_saved.append(send_to_saved_chat)
-
-                await merge_old_and_new_ids()
-                await pin_messages()
-                will_reply.clear()
-                was_saved.clear()
-
-    ids: dict[int, int] = {}
-
-    will_delete: list[patched.Message] = [] # сообщения которые будут удалены
-    will_forward: list[patched.Message] = [] # сообщения которые должны быть пересланны
-    will_reply: list[patched.Message] = [] # группа сообщений или одно сообщение для ответа
-    was_saved: list[patched.Message] = [] # сообщения которые были сохраненны успешно
-    pinned: list[patched.Message] = []
-
-    reply_flag = False
-    grouped_id = 0
-    last_grouped_id = 0
+            except errors.MessageIdInvalidError as e:
+                logger.error(e)
+                ui.message(e, True)
 
-    ui.progress_counters.visible = True
-    ui.total = source.total
-
-    message: patched.Message
-    for i, message in enumerate(source):
-        if not isinstance(message, patched.MessageService):
-            if message.pinned:
-                pinned.append(message)
-            if message.grouped_id and reply_flag:
-                if message.grouped_id == grouped_id:
-                    will_reply.append(message)
-                    ui.value = i
-                    continue
-            if message.is_reply:
-                if message.grouped_id:
-                    if message.grouped_id == grouped_id:
-                        will_reply.append(message)
-                    else:
-                        await forward_messages_and_save_ids()
-                        await reply_message_and_save_ids()
-                        grouped_id = message.grouped_id
-                        reply_flag = True
-                        will_reply.append(message)
-                else:
-                    await forward_messages_and_save_ids()
-                    will_reply.append(message)
-                    await reply_message_and_save_ids()
-            else:
-                await reply_message_and_save_ids()
-                reply_flag = False
-                if len(will_forward) < 90:
-                    will_forward.append(message)
-                    last_grouped_id = message.grouped_id
-                else:
-                    if message.grouped_id:
-                        if message.grouped_id == last_grouped_id:
-                            ui.value = i
-                            continue
-                        await forward_messages_and_save_ids()
-                    else:
-                        await forward_messages_and_save_ids()
-        ui.value = i
-
-    if will_forward:
-        await forward_messages_and_save_ids()
-        await pin_messages()
+    def commit(source: list[Record]) -> None:
+        """Write the processed batch to the journal."""
+        database.commit_favorites_batch(
+            *pair,
+            source[0].id,
+            source[-1].id,
+            len(source),
+            {m.id: ids[m.id] for m in source if m.id in ids},
+            [m.id for m in source if m.pinned]
+        )
+        if media:
+            mapped = [
+                m for m in source if m.media_id is not None and m.id in ids
+            ]
+            for m in mapped:
+                media.register(m)
+            database.add_favorites_media(
+                *pair, [(m.media_id, m.size, m.id) for m in mapped]
+            )
 
-    if will_reply:
-        await reply_message_and_save_ids()
-        await pin_messages()
+    def resolve_aliases() -> None:
+        """Map collapsed duplicates to the copies of their originals."""
+        resolved = {
+            duplicate: ids[original]
+            for duplicate, (original, _) in aliases.items() if original in ids
+        }
+        for duplicate in resolved:
+            del aliases[duplicate]
+        if resolved:
+            ids.update(resolved)
+            database.add_favorites_ids(*pair, resolved)
 
-    if pinned:
-        await pin_messages()
+    async def open_bridge() -> tuple[types.Channel, types.Channel] | None:
+        """
+        Create a temporary private supergroup and join the recepient to it.
+        The group is saved before anything is staged in it, so a group left
+        by an interrupted run is deleted here. Return the group as the
+        sender and as the recepient see it.
+        """
+        for leftover in database.get_favorites_bridges(*pair) or []:
+            logger.info("Delete the temporary group of the previous run.")
+            await close_bridge(types.InputChannel(*leftover))
+        channel: types.Channel | None = None
+        try:
+            created = await execute(
+                sender,
+                channels.CreateChannelRequest(
+                    title="Syncogram",
+                    about="Temporary chat of the favorites synchronization.",
+                    megagroup=True
+                ),
+                ui,
+                idempotent=False
+            )
+            channel = created.chats[0]
+            database.set_favorites_bridge(
+                *pair, channel.id, channel.access_hash
+            )
+            invite = await execute(
+                sender, messages.ExportChatInviteRequest(channel), ui
+            )
+            invite_hash, _ = utils.parse_username(invite.link)
+            joined = await execute(
+                recepient, messages.ImportChatInviteRequest(invite_hash), ui
+            )
+            return channel, joined.chats[0]
+        except errors.RPCError as error:
+            logger.warning(error)
+            ui.message(
+                "Unable to create a temporary group, messages will be sent "
+                "through the chat with the recepient."
+            )
+            if channel is not None:
+                await close_bridge(channel)
+            return None
+
+    async def close_bridge(
+        channel: types.Channel | types.InputChannel
+    ) -> None:
+        """Delete the temporary supergroup with all staged messages."""
+        try:
+            await execute(sender, channels.DeleteChannelRequest(channel), ui)
+        except (
+            errors.ChannelInvalidError,
+            errors.ChannelPrivateError
+        ) as error:
+            logger.warning(error)
+        except errors.RPCError as error:
+            logger.error(error)
+            ui.message(f"Unable to delete the temporary group: {error}", True)
+            return
+        database.remove_favorites_bridge(
+            *pair, utils.get_peer_id(channel, add_mark=False)
+        )
 
-    if will_delete:
+    async def stage_messages(
+        batch: Batch
+    ) -> list[patched.Message] | list[int] | None:
+        """
+        Forward messages to the staging chat. In the supergroup the ids
+        are shared by all members, so the ids are returned as is. In the
+        chat with the recepient they are returned as the recepient sees
+        them, the oldest first.
+        """
+        source = batch.messages
         try:
-            await sender.delete_messages(
-                recepient_entity.username,
-                will_delete
+            messages_to_recepient = await execute(
+                sender,
+                partial(
+                    sender.forward_messages,
+                    bridge[0] if bridge else recepient_entity.username,
+                    [record.id for record in source],
+                    from_peer='me'
+                ),
+                ui,
+                idempotent=False
             )
-        except errors.MessageIdInvalidError as msg:
-            logger.error(msg)
-            ui.message(msg)
+        except (
+            errors.MessageIdsEmptyError,
+            errors.MessageIdInvalidError,
+            errors.GroupedMediaInvalidError
+        ) as error:
+            logger.error(error)
+            ui.message(f"{error}. {len(source)} messages wasn't sync.", True)
+            return None
+        staged_ids = [message.id for message in messages_to_recepient]
+        batch.staged = staged_ids
+        if bridge:
+            return staged_ids
+        database.add_favorites_staged(*pair, staged_ids)
+
+        get_messages_from_sender = await execute(
+            recepient,
+            partial(
+                recepient.get_messages,
+                sender_entity.username,
+                limit=len(messages_to_recepient)
+            ),
+            ui
+        )
+        return list(reversed(get_messages_from_sender))
+
+    async def copy_segment(
+        segment: Segment, staged: list[patched.Message] | list[int]
+    ) -> list[patched.Message]:
+        """Copy the staged messages of one segment to the saved chat."""
+        if not segment.is_reply:
+            return await execute(
+                recepient,
+                partial(
+                    recepient.forward_messages,
+                    'me',
+                    staged,
+                    from_peer=bridge[1] if bridge else None,
+                    drop_author=True
+                ),
+                ui,
+                idempotent=False
+            )
+
+        if bridge:
+            staged = await execute(
+                recepient,
+                partial(recepient.get_messages, bridge[1], ids=staged),
+                ui
+            )
+        reply_to = ids.get(segment.reply_to)
+        if len(staged) > 1:
+            return await execute(
+                recepient,
+                partial(
+                    recepient.send_file,
+                    'me',
+                    file=staged,
+                    caption=[message.text for message in staged],
+                    reply_to=reply_to
+                ),
+                ui,
+                idempotent=False
+            )
+        saved = await execute(
+            recepient,
+            partial(recepient.send_message, 'me', staged[0], reply_to=reply_to),
+            ui,
+            idempotent=False
+        )
+        return [saved]
+
+    async def delete_staged(staged: list[int]) -> None:
+        """
+        Delete staging messages from the staging chat. Messages of the
+        temporary group are not journaled, the whole group is.
+        """
+        try:
+            await execute(
+                sender,
+                partial(
+                    sender.delete_messages,
+                    bridge[0] if bridge else recepient_entity.username,
+                    staged
+                ),
+                ui
+            )
+        except errors.MessageIdInvalidError as error:
+            logger.error(error)
+            ui.message(error)
+        if not bridge:
+            database.remove_favorites_staged(*pair, staged)
+
+    async def cleanup(trash: asyncio.Queue) -> None:
+        """
+        Delete staging messages in the background, as soon as a full
+        chunk of them was copied by the recepient. In the temporary group
+        too, so it never holds more than a few batches.
+        """
+        staged: list[int] = []
+        while (copied := await trash.get()) is not None:
+            staged.extend(copied)
+            while len(staged) >= CLEANUP:
+                chunk, staged = staged[:CLEANUP], staged[CLEANUP:]
+                await delete_staged(chunk)
+        if staged:
+            await delete_staged(staged)
+
+    async def process(
+        batch: Batch, staged: list[patched.Message] | list[int] | None
+    ) -> None:
+        """
+        Copy the staged batch segment by segment: targets of replies are
+        mapped by the previous segments.
+        """
+        if staged is None:
+            commit(batch.messages)
+            trash.put_nowait(batch.staged)
+            return
+
+        position = 0
+        segment: Segment
+        for segment in batch.segments:
+            part = staged[position:position + len(segment)]
+            position += len(segment)
+            try:
+                saved = await copy_segment(segment, part)
+            except (
+                errors.MessageIdsEmptyError,
+                errors.MessageIdInvalidError,
+                errors.GroupedMediaInvalidError,
+                errors.MultiMediaTooLongError,
+                errors.EntityBoundsInvalidError,
+                errors.MsgIdInvalidError,
+                errors.MessageEmptyError,
+                errors.MessageTooLongError,
+            ) as error:
+                logger.error(error)
+                ui.message(f"{error}. {len(part)} messages wasn't sync.", True)
+                continue
+            for message, new in zip(segment.messages, saved):
+                ids.setdefault(message.id, new.id)
+            resolve_aliases()
+
+        commit(batch.messages)
+        trash.put_nowait(batch.staged)
+
+    mark, marked = database.get_favorites_mark(*pair)
+    offset, synced = database.get_favorites_progress(*pair)
+    ids: dict[int, int] = database.get_favorites_ids(*pair)
+    if offset:
+        logger.info(f"Resume favorites synchronization after #{offset}.")
+        ui.message(f"Resume synchronization after message #{offset}.")
+    elif mark:
+        logger.info(f"Incremental favorites synchronization after #{mark}.")
+        ui.message(f"Only messages newer than #{mark} will be synchronized.")
+    offset = max(offset, mark)
+    synced += marked
+    last_id = offset
+
+    # Остатки прошлого запуска в чате с получателем удаляются до того,
+    # как сообщения начнут попадать во временную группу.
+    bridge: tuple[types.Channel, types.Channel] | None = None
+    leftover = database.get_favorites_staged(*pair)
+    for i in range(0, len(leftover), CLEANUP):
+        await delete_staged(leftover[i:i + CLEANUP])
+    bridge = await open_bridge() if BRIDGE else None
+    trash: asyncio.Queue = asyncio.Queue() # сообщения которые будут удалены
+    cleaner = asyncio.create_task(cleanup(trash))
+    planner = Planner(ids)
+    media = MediaIndex(database.get_favorites_media(*pair)) if DEDUP else None
+    aliases: dict[int, tuple[int, Record]] = {} # дубликаты медиа и их оригиналы
+
+    ui.progress_counters.visible = True
+    ui.total = counter.total
+    ui.value = min(synced, counter.total)
+
+    async def produce(queue: asyncio.Queue) -> None:
+        """
+        Plan the stream and stage batches ahead of the recepient. The end
+        is signalled only while the consumer reads, a cancelled producer
+        does not wait for a place in the queue.
+        """
+        nonlocal last_id
+        message: patched.Message
+        stream = iter_saved_messages(sender, ui, offset)
+        try:
+            async with aclosing(lookahead(stream, LOOKAHEAD)) as saved:
+                async for message in saved:
+                    last_id = message.id
+                    if isinstance(message, patched.MessageService):
+                        ui.value += 1
+                        continue
+                    record = Record.from_message(message)
+                    original = media.original(record) if media else None
+                    if original is not None:
+                        aliases[record.id] = (original, record)
+                        planner.skip(record)
+                        resolve_aliases()
+                        ui.value += 1
+                        continue
+                    batch = planner.feed(record)
+                    if batch is not None:
+                        await queue.put(
+                            (batch, await stage_messages(batch))
+                        )
+                    ui.value += 1
+
+            for batch in planner.flush():
+                await queue.put((batch, await stage_messages(batch)))
+        except Exception:
+            await queue.put(None)
+            raise
+        await queue.put(None)
+
+    async def forward_unresolved() -> None:
+        """Forward collapsed duplicates whose originals were not mapped."""
+        if not aliases:
+            return
+        records = sorted(
+            (record for _, record in aliases.values()), key=lambda r: r.id
+        )
+        aliases.clear()
+        report = f"{len(records)} collapsed media messages are forwarded."
+        logger.warning(report)
+        ui.message(report)
+        rest = Planner(ids)
+        for record in records:
+            media.restore(record)
+            if (batch := rest.feed(record)) is not None:
+                await process(batch, await stage_messages(batch))
+        for batch in rest.flush():
+            await process(batch, await stage_messages(batch))
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE)
+    producer = asyncio.create_task(produce(queue))
+    try:
+        while (item := await queue.get()) is not None:
+            await process(*item)
+        await producer
+        await forward_unresolved()
+
+        trash.put_nowait(None)
+        await cleaner
+        await pin_messages()
+        if media and media.skipped:
+            report = (
+                f"{media.skipped} duplicated media messages were collapsed, "
+                f"{media.bytes / 1024 / 1024:.1f} MB and at least "
+                f"{media.requests} requests were saved."
+            )
+            logger.info(report)
+            ui.message(report)
+    finally:
+        producer.cancel()
+        cleaner.cancel()
+        await asyncio.gather(producer, cleaner, return_exceptions=True)
+        if bridge:
+            await close_bridge(bridge[0])
+
+    database.finish_favorites_journal(*pair, last_id, ui.value)
     ui.success()
@@ -1,10 +1,9 @@
-import asyncio
-
 from telethon import errors
 from telethon.tl.functions import users, account
 from telethon.tl import types
 
 from .decorators import autoconnect
+from .executor import execute
 from ..components import Task
 from ..telegram import UserClient
 from ..utils import logging
@@ -22,25 +21,16 @@ async def sync_profile_first_name_and_second_name(ui: Task, **kwargs):
     sender: UserClient = kwargs["sender"]
     recepient: UserClient = kwargs["recepient"]
 
-    while True:
-        try:
-            user: types.users.UserFull = await sender(
-                users.GetFullUserRequest("me")
-            )
-            break
-        except (errors.TimedOutError, errors.UserIdInvalidError) as error:
-            logger.critical(error)
-            ui.unsuccess(error)
-            ui.message(error)
-            return
-        except errors.FloodWaitError as flood:
-            logger.warning(flood)
-            ui.cooldown(flood)
-            ui.message(flood)
-            await asyncio.sleep(flood.seconds)
-            ui.uncooldown()
+    try:
+        user: types.users.UserFull = await execute(
+            sender, users.GetFullUserRequest("me"), ui
+        )
+    except (errors.TimedOutError, errors.UserIdInvalidError) as error:
+        logger.critical(error)
+        ui.unsuccess(error)
+        ui.message(error)
+        return
 
-    timeout = 1
     ui.total = 4 if user.full_user.birthday else 3
     ui.progress_counters.visible = True
 
@@ -53,43 +43,29 @@ async def sync_profile_first_name_and_second_name(ui: Task, **kwargs):
     bio = user.full_user.about
     bio = str() if bio is None else bio
 
-    while True:
-        try:
-            await asyncio.sleep(timeout)
-            await recepient(
-                account.UpdateProfileRequest(first_name, last_name, bio)
-            )
-            ui.value += 3
-            break
-        except (errors.AboutTooLongError, errors.FirstNameInvalidError) as error:
-            logger.warning(error)
-            ui.message(error)
-            break
-        except errors.FloodWaitError as flood:
-            logger.warning(flood)
-            ui.cooldown(flood)
-            await asyncio.sleep(flood.seconds)
-            ui.uncooldown()
+    try:
+        await execute(
+            recepient,
+            account.UpdateProfileRequest(first_name, last_name, bio),
+            ui
+        )
+        ui.value += 3
+    except (errors.AboutTooLongError, errors.FirstNameInvalidError) as error:
+        logger.warning(error)
+        ui.message(error)
 
     if user.full_user.birthday is not None:
-        while True:
-            try:
-                await recepient(
-                    account.UpdateBirthdayRequest(
-                        types.TypeBirthday(
-                            user.full_user.birthday.day,
-                            user.full_user.birthday.month,
-                            user.full_user.birthday.year
-                        )
-                    )
+        await execute(
+            recepient,
+            account.UpdateBirthdayRequest(
+                types.TypeBirthday(
+                    user.full_user.birthday.day,
+                    user.full_user.birthday.month,
+                    user.full_user.birthday.year
                 )
-                ui.value += 1
-                break
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.cooldown(flood)
-                ui.message(flood)
-                await asyncio.sleep(flood.seconds)
-                ui.uncooldown()
+            ),
+            ui
+        )
+        ui.value += 1
 
     ui.success()
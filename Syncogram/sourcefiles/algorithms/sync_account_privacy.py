@@ -1,10 +1,11 @@
-import asyncio
+from functools import partial
 
 from telethon import errors
 from telethon.tl.functions import account
 from telethon.tl import types
 
 from .decorators import autoconnect
+from .executor import execute
 from ..components import Task
 from ..telegram import UserClient
 from ..utils import logging
@@ -22,21 +23,16 @@ async def sync_privacy_settings(ui: Task, **kwargs):
                 for glob_user in users:
                     if rule_user == glob_user.id:
                         if glob_user.username or glob_user.usernames:
-                            while True:
-                                try:
-                                    x = await recepient.get_input_entity(
-                                        glob_user.username or \
-                                        glob_user.usernames[0].username
-                                    )
-                                    source.append(x)
-                                    break
-                                except errors.FloodWaitError as flood:
-                                    logger.warning(flood)
-                                    ui.message(flood)
-                                    ui.cooldown(flood)
-                                    # timeout += 5
-                                    await asyncio.sleep(flood.seconds)
-                                    ui.uncooldown()
+                            x = await execute(
+                                recepient,
+                                partial(
+                                    recepient.get_input_entity,
+                                    glob_user.username or \
+                                    glob_user.usernames[0].username
+                                ),
+                                ui
+                            )
+                            source.append(x)
         return source
 
     ui.default()
@@ -60,30 +56,17 @@ async def sync_privacy_settings(ui: Task, **kwargs):
 
     ui.progress_counters.visible = True
     ui.total = len(input_privacies) + 1
-    timeout = 1
 
     for privacy in input_privacies:
-        await asyncio.sleep(timeout)
         rules: list[types.TypePrivacyRule] = []
-        while True:
-            try:
-                request: types.account.PrivacyRules = await sender(
-                    account.GetPrivacyRequest(
-                        privacy
-                    )
-                )
-                break
-            except errors.PrivacyKeyInvalidError as error:
-                logger.error(error)
-                ui.message(error, True)
-                break
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.message(flood)
-                ui.cooldown(flood)
-                timeout += 5
-                await asyncio.sleep(flood.seconds)
-                ui.uncooldown()
+        try:
+            request: types.account.PrivacyRules = await execute(
+                sender, account.GetPrivacyRequest(privacy), ui
+            )
+        except errors.PrivacyKeyInvalidError as error:
+            logger.error(error)
+            ui.message(error, True)
+            continue
 
         for rule in request.rules:
             if isinstance(rule, types.PrivacyValueAllowAll):
@@ -136,68 +119,39 @@ async def sync_privacy_settings(ui: Task, **kwargs):
                 rules.append(types.InputPrivacyValueDisallowChatParticipants(users))
                 continue
 
-        while True:
-            try:
-                await recepient(
-                    account.SetPrivacyRequest(
-                        key=privacy,
-                        rules=rules
-                    )
-                )
-                ui.value += 1
-                break
-            except (
-                errors.PrivacyKeyInvalidError, errors.PrivacyTooLongError
-            ) as error:
-                logger.error(error)
-                ui.message(error, True)
-                break
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.message(flood)
-                ui.cooldown(flood)
-                timeout += 5
-                await asyncio.sleep(flood.seconds)
-                ui.uncooldown()
-
-    while True:
         try:
-            data: types.TypeGlobalPrivacySettings = await sender(
-                account.GetGlobalPrivacySettingsRequest()
-            )
-            break
-        except errors.FloodWaitError as flood:
-            logger.warning(flood)
-            ui.message(flood)
-            ui.cooldown(flood)
-            timeout += 5
-            await asyncio.sleep(flood.seconds)
-            ui.uncooldown()
-
-    while True:
-        try:
-            await recepient(
-                account.SetGlobalPrivacySettingsRequest(
-                    types.TypeGlobalPrivacySettings(
-                        data.archive_and_mute_new_noncontact_peers,
-                        data.keep_archived_unmuted,
-                        data.keep_archived_folders,
-                        data.hide_read_marks,
-                        data.new_noncontact_peers_require_premium
-                    )
-                )
+            await execute(
+                recepient,
+                account.SetPrivacyRequest(key=privacy, rules=rules),
+                ui
             )
             ui.value += 1
-            break
-        except errors.AutoarchiveNotAvailableError as error:
+        except (
+            errors.PrivacyKeyInvalidError, errors.PrivacyTooLongError
+        ) as error:
             logger.error(error)
             ui.message(error, True)
-            break
-        except errors.FloodWaitError as flood:
-            logger.warning(flood)
-            ui.message(flood)
-            ui.cooldown(flood)
-            timeout += 5
-            await asyncio.sleep(flood.seconds)
-            ui.uncooldown()
+
+    data: types.TypeGlobalPrivacySettings = await execute(
+        sender, account.GetGlobalPrivacySettingsRequest(), ui
+    )
+
+    try:
+        await execute(
+            recepient,
+            account.SetGlobalPrivacySettingsRequest(
+                types.TypeGlobalPrivacySettings(
+                    data.archive_and_mute_new_noncontact_peers,
+                    data.keep_archived_unmuted,
+                    data.keep_archived_folders,
+                    data.hide_read_marks,
+                    data.new_noncontact_peers_require_premium
+                )
+            ),
+            ui
+        )
+        ui.value += 1
+    except errors.AutoarchiveNotAvailableError as error:
+        logger.error(error)
+        ui.message(error, True)
     ui.success()
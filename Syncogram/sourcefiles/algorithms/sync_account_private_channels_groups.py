@@ -1,15 +1,16 @@
-import asyncio
 import re
+from functools import partial
 
 from telethon import errors
-from telethon.tl import custom
 from telethon.tl import patched
 from telethon.tl import types
 from telethon.tl.functions import messages
 
 from .decorators import autoconnect
+from .dialogs import load_dialogs
+from .executor import execute
 from ..components import Task
-from ..telegram import UserClient
+from ..telegram import DialogRecord, UserClient
 from ..utils import logging
 
 logger = logging()
@@ -46,71 +47,34 @@ async def sync_private_channels_and_groups(ui: Task, **kwargs):
             return False
         return True
 
-    async def __get_dialogs(client: UserClient) -> None | list[custom.dialog.Dialog]:
-        while True:
-            try:
-                source: list[custom.dialog.Dialog] = await client.get_dialogs()
-                break
-            except (
-                errors.InputConstructorInvalidError,
-                errors.OffsetPeerIdInvalidError,
-                errors.SessionPasswordNeededError,
-                errors.TimeoutError
-            ) as error:
-                logger.critical(error)
-                ui.unsuccess("It is not possible to get a list of the sender's bots.")
-                ui.message("It is not possible to get a list of the sender's bots.")
-                return
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.cooldown(flood)
-                asyncio.sleep(flood.seconds)
-                ui.uncooldown()
-        return source
-
     def is_already_joined(channel_id: int) -> bool:
         """Looking channel or group in Recepient chat list."""
-        for channel in recepient_dialogs:
-            if isinstance(channel, types.Channel):
-                if channel.entity.id == channel_id:
-                    return True
-        return False
+        return channel_id in recepient_dialogs
 
     async def channels() -> None:
-        for channel in sender_dialogs:
-            if isinstance(channel.entity, types.Channel):
-                if channel.entity.username is None and \
-                    channel.entity.usernames is None:
-                    if is_already_joined(channel.entity.id):
-                        continue
-                    channel_and_link.setdefault(channel.entity.title)
-                    channels_to_find.append(channel)
+        for channel in sender_dialogs.kinds("channel", "group"):
+            if channel.entity.username is None and \
+                channel.entity.usernames is None:
+                if is_already_joined(channel.id):
+                    continue
+                channel_and_link.setdefault(channel.entity.title)
+                channels_to_find.append(channel)
         ui.message(f"Number of private channels: {len(channels_to_find)}")
 
     async def find_unique_hashes_in_overall_messages():
         length = len(channels_to_find)
-        timeout = 10 if length > 50 else 5
         text = []
         ui.message("Search for links to join through all channels.")
         ui.total = length
         ui.value = 0
         ui.progress_counters.visible = True
         for channel in channels_to_find:
-            while True:
-                try:
-                    await asyncio.sleep(timeout)
-                    last_50_messages = await sender.get_messages(
-                        channel.input_entity, limit=5
-                    )
-                    ui.value += 1
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
+            last_50_messages = await execute(
+                sender,
+                partial(sender.get_messages, channel.entity, limit=5),
+                ui
+            )
+            ui.value += 1
 
             message: patched.Message
             for message in last_50_messages:
@@ -120,7 +84,6 @@ async def sync_private_channels_and_groups(ui: Task, **kwargs):
         hashes.extend(find_deep_links_hashes(check))
 
     async def check_deep_link_valid():
-        timeout = 10 if len(hashes) > 50 else 5
         latest_client = sender
         ui.message(f"The number of unique links found to join: {len(hashes)}")
         ui.message("The search for your private channels begins.")
@@ -130,31 +93,21 @@ async def sync_private_channels_and_groups(ui: Task, **kwargs):
             if is_all_founded():
                 break
             latest_client = sender if latest_client == recepient else recepient
-            while True:
-                try:
-                    await asyncio.sleep(timeout)
-                    chat: types.ChatInvite | types.ChatInvitePeek | types.ChatInviteAlready \
-                        = await latest_client(
-                        messages.CheckChatInviteRequest(
-                            hash=invite_hash
-                        )
-                    )
-                    ui.value += 1
-                    break
-                except (
-                    errors.InviteHashEmptyError,
-                    errors.InviteHashExpiredError,
-                    errors.InviteHashInvalidError,
-                ) as error:
-                    ui.message(f"The hash: [{invite_hash}] is invalid.\n{error}")
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
+            try:
+                chat: types.ChatInvite | types.ChatInvitePeek | types.ChatInviteAlready \
+                    = await execute(
+                    latest_client,
+                    messages.CheckChatInviteRequest(hash=invite_hash),
+                    ui
+                )
+                ui.value += 1
+            except (
+                errors.InviteHashEmptyError,
+                errors.InviteHashExpiredError,
+                errors.InviteHashInvalidError,
+            ) as error:
+                ui.message(f"The hash: [{invite_hash}] is invalid.\n{error}")
+                continue
 
             if isinstance(chat, (types.ChatInvitePeek, types.ChatInviteAlready)):
                 if chat.chat.title in channel_and_link:
@@ -169,58 +122,49 @@ async def sync_private_channels_and_groups(ui: Task, **kwargs):
 
     async def join_to_channels_or_groups():
         length = len(channel_and_link)
-        timeout = 10 if length > 50 else 5
         ui.total = length
         ui.value = 0
         ui.progress_counters.visible = True
         for key, value in channel_and_link.items():
             if value is not None:
-                while True:
-                    try:
-                        await asyncio.sleep(timeout)
-                        await recepient(
-                            messages.ImportChatInviteRequest(
-                                hash=value
-                            )
-                        )
-                        ui.value += 1
-                        break
-                    except (
-                        errors.UserAlreadyParticipantError,
-                        errors.InviteHashInvalidError,
-                        errors.InviteHashExpiredError,
-                        errors.InviteHashEmptyError,
-                        errors.UsersTooMuchError,
-                    ) as error:
-                        logger.error(error)
-                        ui.message(error, True)
-                        break
-                    except errors.ChannelsTooMuchError as error:
-                        logger.critical(error)
-                        ui.message(error)
-                        return
-                    except errors.InviteRequestSentError:
-                        ui.message(f"The application for membership has been successfully submitted: {key}")
-                        break
-                    except errors.FloodWaitError as flood:
-                        logger.warning(flood)
-                        ui.message(flood)
-                        timeout += 5
-                        ui.cooldown(flood)
-                        await asyncio.sleep(flood.seconds)
-                        ui.uncooldown()
+                try:
+                    updates = await execute(
+                        recepient,
+                        messages.ImportChatInviteRequest(hash=value),
+                        ui
+                    )
+                    for chat in updates.chats:
+                        recepient_dialogs.add(chat)
+                    ui.value += 1
+                except (
+                    errors.UserAlreadyParticipantError,
+                    errors.InviteHashInvalidError,
+                    errors.InviteHashExpiredError,
+                    errors.InviteHashEmptyError,
+                    errors.UsersTooMuchError,
+                ) as error:
+                    logger.error(error)
+                    ui.message(error, True)
+                except errors.ChannelsTooMuchError as error:
+                    logger.critical(error)
+                    ui.message(error)
+                    return
+                except errors.InviteRequestSentError:
+                    ui.message(f"The application for membership has been successfully submitted: {key}")
         ui.message(f"{ui.value} / {ui.total} was founded.")
         for key, value in channel_and_link.items():
             if value is None:
                 ui.message(f"{key} was not found.")
 
-    sender_dialogs: list[custom.dialog.Dialog] = await __get_dialogs(sender)
-    recepient_dialogs: list[custom.dialog.Dialog] = await __get_dialogs(recepient)
+    sender_dialogs = await load_dialogs(sender, kwargs["sender_dialogs"], ui)
+    recepient_dialogs = await load_dialogs(
+        recepient, kwargs["recepient_dialogs"], ui
+    )
 
     if sender_dialogs is None or recepient_dialogs is None:
         ui.unsuccess()
         return
-    channels_to_find: list[custom.dialog.Dialog] = []
+    channels_to_find: list[DialogRecord] = []
     channel_and_link: dict[str, str] = {}
     hashes: list[str] = []
 
@@ -1,166 +1,223 @@
-import datetime
-import asyncio
+from functools import partial
 
-from telethon import errors
-from telethon.tl.functions import channels, messages, account
+from telethon import errors, utils
+from telethon.tl.functions import channels, messages, account, chatlists
 from telethon.tl import types
-from telethon.tl.custom.dialog import Dialog
 
 from .decorators import autoconnect
+from .dialogs import load_dialogs
+from .executor import execute
 from ..components import Task
-from ..telegram import UserClient
+from ..telegram import DialogRecord, DialogSnapshot, UserClient, rebind
 from ..utils import logging
 
 logger = logging()
 
+CHATLISTS = True # вступать через временные папки вместо каждого канала
+CHATLIST_PEERS = 100
+
 @logger.catch()
 @autoconnect
 async def sync_public_channels_and_groups(ui: Task, **kwargs):
     """
-    The algorithm for synchronizing public channels and groups, 
+    The algorithm for synchronizing public channels and groups,
     the status of pinning and archiving.
     """
-    def get_public_channels(dialogs: list[Dialog]) -> list[Dialog]:
-        lst: list[Dialog] = []
-        dialog: Dialog
-        for dialog in dialogs:
-            if not isinstance(dialog.entity, types.Chat) \
-                and not dialog.is_user \
-                    and dialog.entity.username:
-                lst.append(dialog)
-        return lst
-
-    async def __get_dialogs(client: UserClient) -> list[Dialog]:
-        while True:
+    def get_public_channels(dialogs: DialogSnapshot) -> list[DialogRecord]:
+        return [
+            dialog for dialog in dialogs.kinds("channel", "group")
+            if dialog.entity.username
+        ]
+
+    async def join_chatlist(
+        entities: list[types.Channel]
+    ) -> dict[int, types.Channel]:
+        """
+        Share a temporary folder of the sender with the channels and join
+        it by the recepient in one request. Both folders are removed, the
+        recepient keeps the channels. Return the joined channels as the
+        recepient sees them.
+        """
+        filters: types.messages.DialogFilters = await execute(
+            sender, messages.GetDialogFiltersRequest(), ui
+        )
+        used = {getattr(f, "id", None) for f in filters.filters}
+        filter_id = next(i for i in range(2, 256) if i not in used)
+        peers = [utils.get_input_peer(entity) for entity in entities]
+        chatlist = types.InputChatlistDialogFilter(filter_id)
+
+        await execute(
+            sender,
+            messages.UpdateDialogFilterRequest(
+                id=filter_id,
+                filter=types.DialogFilterChatlist(
+                    id=filter_id,
+                    title=types.TextWithEntities("Syncogram", []),
+                    pinned_peers=[],
+                    include_peers=peers
+                )
+            ),
+            ui
+        )
+        try:
+            exported: types.chatlists.ExportedChatlistInvite = await execute(
+                sender,
+                chatlists.ExportChatlistInviteRequest(
+                    chatlist=chatlist, title="Syncogram", peers=peers
+                ),
+                ui
+            )
+            slug = exported.invite.url.rsplit("/", 1)[-1]
+            invite = await execute(
+                recepient, chatlists.CheckChatlistInviteRequest(slug), ui
+            )
+            wanted = {entity.id for entity in entities}
+            chats = [chat for chat in invite.chats if chat.id in wanted]
+            recepient.peers.remember(*chats)
+            updates = await execute(
+                recepient,
+                chatlists.JoinChatlistInviteRequest(
+                    slug, [utils.get_input_peer(chat) for chat in chats]
+                ),
+                ui
+            )
+            for update in getattr(updates, "updates", []):
+                if isinstance(update, types.UpdateDialogFilter):
+                    await execute(
+                        recepient,
+                        chatlists.LeaveChatlistRequest(
+                            types.InputChatlistDialogFilter(update.id), []
+                        ),
+                        ui
+                    )
+            return {chat.id: chat for chat in chats}
+        finally:
+            await execute(
+                sender, messages.UpdateDialogFilterRequest(id=filter_id), ui
+            )
+
+    async def join_by_chatlists(
+        entities: list[types.Channel]
+    ) -> dict[int, types.Channel]:
+        joined: dict[int, types.Channel] = {}
+        for i in range(0, len(entities), CHATLIST_PEERS):
             try:
-                source: list[Dialog] = await client.get_dialogs()
-                break
-            except (
-                errors.InputConstructorInvalidError,
-                errors.OffsetPeerIdInvalidError,
-                errors.SessionPasswordNeededError,
-                errors.TimeoutError
-            ) as error:
-                logger.critical(error)
-                ui.unsuccess("It is not possible to get a list of channels.")
-                ui.message("It is not possible to get a list of channels.")
-                return
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.cooldown(flood)
-                asyncio.sleep(flood.seconds)
-                ui.uncooldown()
-        return source
+                joined.update(
+                    await join_chatlist(entities[i:i + CHATLIST_PEERS])
+                )
+            except errors.RPCError as error:
+                logger.warning(error)
+                ui.message(
+                    f"Unable to join channels by a folder: {error}. "
+                    "They will be joined one by one.",
+                    True
+                )
+        return joined
 
     ui.default()
 
     sender: UserClient = kwargs["sender"]
     recepient: UserClient = kwargs["recepient"]
-    
-    source = await __get_dialogs(sender)
-    recepient_channels = await __get_dialogs(recepient)
 
-    channels_list: list[Dialog] = get_public_channels(source)
-    recepient_channels: list[Dialog] = get_public_channels(recepient_channels)
-    r_channels: list[int] = [channel.entity.id for channel in recepient_channels]
+    source = await load_dialogs(sender, kwargs["sender_dialogs"], ui)
+    recepient_dialogs = await load_dialogs(
+        recepient, kwargs["recepient_dialogs"], ui
+    )
+    if source is None or recepient_dialogs is None:
+        ui.unsuccess()
+        return
+
+    channels_list: list[DialogRecord] = get_public_channels(source)
 
     ui.progress_counters.visible = True
     ui.total = len(channels_list)
 
-    timeout = 10 if len(channels_list) <= 50 else 20
-    timeout_additional = 2.5
+    # Каналы глазами получателя, с его access_hash
+    joined: dict[int, types.Channel] = {}
+    if CHATLISTS:
+        joined = await join_by_chatlists([
+            channel.entity for channel in channels_list
+            if channel.id not in recepient_dialogs
+        ])
 
-    channel: Dialog
+    channel: DialogRecord
     for channel in channels_list:
         entity: types.Channel = channel.entity
-        if entity.id not in r_channels:
-            while True:
-                try:
-                    await asyncio.sleep(timeout)
-                    await recepient(
-                        channels.JoinChannelRequest(entity.username)
+        if entity.id not in recepient_dialogs:
+            peer = await execute(
+                recepient, partial(recepient.peers.resolve, entity), ui
+            )
+            if peer is None:
+                ui.message(f"Unsuccess join to: @{entity.title}", True)
+                ui.value += 1
+                continue
+            try:
+                if entity.id not in joined:
+                    updates = await execute(
+                        recepient, channels.JoinChannelRequest(peer), ui
+                    )
+                    chats = getattr(updates, "chats", [])
+                    recepient.peers.remember(*chats)
+                    joined.update(
+                        (chat.id, chat) for chat in chats
+                        if chat.id == entity.id
                     )
-                    break
-                except errors.ChannelsTooMuchError as error:
-                    logger.critical(error)
-                    ui.message(error.message)
-                    ui.unsuccess(error)
-                    return
-                except (
-                    errors.ChannelInvalidError,
-                    errors.ChannelPrivateError
-                ) as error:
-                    logger.error(error)
-                    ui.message(f"Unsuccess join to: @{entity.title}", True)
-                    break
-                except errors.InviteRequestSentError:
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
-
-            dialog: types.Dialog = channel.dialog
-            while True:
-                try:
-                    await asyncio.sleep(timeout_additional)
-                    await recepient(account.UpdateNotifySettingsRequest(
-                        peer=entity.username,
+            except errors.ChannelsTooMuchError as error:
+                logger.critical(error)
+                ui.message(error.message)
+                ui.unsuccess(error)
+                return
+            except (
+                errors.ChannelInvalidError,
+                errors.ChannelPrivateError
+            ) as error:
+                logger.error(error)
+                ui.message(f"Unsuccess join to: @{entity.title}", True)
+                recepient.peers.forget(entity)
+            except errors.InviteRequestSentError:
+                pass
+            else:
+                recepient_dialogs.add(
+                    joined.get(entity.id) or rebind(entity, peer),
+                    archived=channel.archived,
+                    pinned=channel.pinned,
+                    notify_settings=channel.notify_settings
+                )
+
+            notify_settings: types.PeerNotifySettings = channel.notify_settings
+            try:
+                await execute(
+                    recepient,
+                    account.UpdateNotifySettingsRequest(
+                        peer=peer,
                         settings=types.InputPeerNotifySettings(
-                            show_previews=dialog.notify_settings.show_previews,
-                            mute_until=dialog.notify_settings.mute_until,
+                            show_previews=notify_settings.show_previews,
+                            mute_until=notify_settings.mute_until,
                             sound=types.NotificationSoundDefault(),
-                            stories_muted=dialog.notify_settings.stories_muted,
-                            stories_hide_sender=dialog.notify_settings.stories_hide_sender,
+                            stories_muted=notify_settings.stories_muted,
+                            stories_hide_sender=notify_settings.stories_hide_sender,
                             stories_sound=types.NotificationSoundDefault()
                         )
-                    ))
-                    break
-                except errors.PeerIdInvalidError as error:
-                    logger.warning(error)
-                    ui.message(f"Failed to synchronize notification settings for: @{entity.username}", True)
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout_additional += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
+                    ),
+                    ui
+                )
+            except errors.PeerIdInvalidError as error:
+                logger.warning(error)
+                ui.message(f"Failed to synchronize notification settings for: @{entity.username}", True)
 
             if channel.archived:
-                while True:
-                    try:
-                        await asyncio.sleep(timeout_additional)
-                        await recepient.edit_folder(entity.username, 1)
-                        break
-                    except errors.FloodWaitError as flood:
-                        logger.warning(flood)
-                        ui.message(flood)
-                        ui.cooldown(flood)
-                        timeout_additional += 5
-                        await asyncio.sleep(flood.seconds)
-                        ui.uncooldown()
+                await execute(
+                    recepient,
+                    partial(recepient.edit_folder, peer, 1),
+                    ui
+                )
 
             if channel.pinned:
-                while True:
-                    try:
-                        await asyncio.sleep(timeout_additional)
-                        await recepient(messages.ToggleDialogPinRequest(
-                            entity.username,
-                            True
-                        ))
-                        break
-                    except errors.FloodWaitError as flood:
-                        logger.warning(flood)
-                        ui.message(flood, True)
-                        ui.cooldown(flood)
-                        timeout_additional += 5
-                        await asyncio.sleep(flood.seconds)
-                        ui.uncooldown()
+                await execute(
+                    recepient,
+                    messages.ToggleDialogPinRequest(peer, True),
+                    ui
+                )
         ui.value += 1
 
     ui.success()
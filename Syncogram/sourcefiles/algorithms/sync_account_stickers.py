@@ -1,46 +1,47 @@
 import asyncio
+from collections import deque
+from functools import partial
+from itertools import islice
 
 from telethon import errors
 from telethon.tl.functions import messages
 from telethon.tl import types
-from telethon import events
 
 from .decorators import autoconnect
+from .executor import execute
+from .responses import fetch
+from .transfer import transfer
 from ..components import Task
 from ..telegram import UserClient
 from ..utils import logging
 
 logger = logging()
 
+WORKERS = 3
+REFERENCE_TTL = 3600 # срок, после которого file_reference документов может устареть
+
 
 @logger.catch()
 @autoconnect
 async def sync_stickers_emojis_gifs(ui: Task, **kwargs):
     """The algorithm for synchronizing stickers and other things."""
     async def __get_entity(client: UserClient) -> types.User | None:
-        while True:
-            try:
-                request: types.User = await client.get_entity('me')
-                return request
-            except (
-                errors.AuthKeyPermEmptyError,
-                errors.MemberNoLocationError,
-                errors.NeedMemberInvalidError,
-                errors.SessionPasswordNeededError,
-                errors.TimeoutError
-            ) as error:
-                logger.critical(error)
-                ui.message(error)
-                return
-            except errors.FloodWaitError as flood:
-                logger.warning(flood)
-                ui.message(flood)
-                ui.cooldown(flood)
-                await asyncio.sleep(flood.seconds)
-                ui.uncooldown()
+        try:
+            return await execute(client, partial(client.get_entity, 'me'), ui)
+        except (
+            errors.AuthKeyPermEmptyError,
+            errors.MemberNoLocationError,
+            errors.NeedMemberInvalidError,
+            errors.SessionPasswordNeededError,
+            errors.TimeoutError
+        ) as error:
+            logger.critical(error)
+            ui.message(error)
+            return None
 
-    async def is_already_have():
-        pass
+    def is_already_have(sticker_set: types.StickerSet) -> bool:
+        """Check the set is installed or archived by the recepient."""
+        return sticker_set.id in installed
 
     ui.default()
 
@@ -54,300 +55,214 @@ async def sync_stickers_emojis_gifs(ui: Task, **kwargs):
         ui.unsuccess()
         return
 
-    while True:
-        try:
-            faved_stickers_list: types.messages.FavedStickers = await sender(
-                messages.GetFavedStickersRequest(0)
-            )
-            faved_stickers: list[types.Document] = faved_stickers_list.stickers
-            break
-        except errors.FloodWaitError as flood:
-            logger.warning(flood)
-            ui.message(flood)
-            ui.cooldown(flood)
-            await asyncio.sleep(flood.seconds)
-            ui.uncooldown()
+    async def get_faved_stickers(client: UserClient) -> list[types.Document]:
+        request: types.messages.FavedStickers = await fetch(
+            client, messages.GetFavedStickersRequest, ui, REFERENCE_TTL
+        )
+        return request.stickers
 
-    while True:
-        try:
-            stickers_list: types.messages.AllStickers = await sender(
-                messages.GetAllStickersRequest(0)
-            )
-            stickers: list[types.TypeStickerSet] = stickers_list.sets
-            break
-        except errors.FloodWaitError as flood:
-            logger.warning(flood)
-            ui.message(flood)
-            ui.cooldown(flood)
-            await asyncio.sleep(flood.seconds)
-            ui.uncooldown()
+    async def get_stickers(client: UserClient) -> list[types.StickerSet]:
+        request: types.messages.AllStickers = await fetch(
+            client, messages.GetAllStickersRequest, ui
+        )
+        return request.sets
 
-    while True:
-        try:
-            stickers_archived_list: types.messages.ArchivedStickers = await sender(
-                messages.GetArchivedStickersRequest(
-                    offset_id=0,
-                    limit=0,
-                    masks=False,
-                    emojis=False
-                )
-            )
-            stickers_archived: list[types.StickerSetCovered] = stickers_archived_list.sets
-            break
-        except errors.FloodWaitError as flood:
-            logger.warning(flood)
-            ui.message(flood)
-            ui.cooldown(flood)
-            await asyncio.sleep(flood.seconds)
-            ui.uncooldown()
+    async def get_emojis(client: UserClient) -> list[types.StickerSet]:
+        request: types.messages.AllStickers = await fetch(
+            client, messages.GetEmojiStickersRequest, ui
+        )
+        return request.sets
 
-    while True:
-        try:
-            emojis_list: types.messages.AllStickers = await sender(
-                messages.GetEmojiStickersRequest(0)
-            )
-            emojis: list[types.TypeStickerSet] = emojis_list.sets
-            break
-        except errors.FloodWaitError as flood:
-            logger.warning(flood)
-            ui.message(flood)
-            ui.cooldown(flood)
-            await asyncio.sleep(flood.seconds)
-            ui.uncooldown()
+    async def get_archived(
+        client: UserClient, emojis: bool
+    ) -> list[types.TypeStickerSetCovered]:
+        request: types.messages.ArchivedStickers = await execute(
+            client,
+            messages.GetArchivedStickersRequest(
+                offset_id=0,
+                limit=0,
+                masks=False,
+                emojis=emojis
+            ),
+            ui
+        )
+        return request.sets
 
-    while True:
-        try:
-            emojis_archived_list: types.messages.ArchivedStickers = await sender(
-                messages.GetArchivedStickersRequest(
-                    offset_id=0,
-                    limit=0,
-                    masks=False,
-                    emojis=True
-                )
-            )
-            emojis_archived: list[types.StickerSetFullCovered] = emojis_archived_list.sets
-            break
-        except errors.FloodWaitError as flood:
-            logger.warning(flood)
-            ui.message(flood)
-            ui.cooldown(flood)
-            await asyncio.sleep(flood.seconds)
-            ui.uncooldown()
+    async def get_gifs(client: UserClient) -> list[types.TypeDocument]:
+        request: types.messages.SavedGifs = await fetch(
+            client, messages.GetSavedGifsRequest, ui, REFERENCE_TTL
+        )
+        return request.gifs
 
-    while True:
-        try:
-            gifs_list: types.messages.SavedGifs = await sender(
-                messages.GetSavedGifsRequest(0)
-            )
-            gifs: list[types.TypeDocument] = gifs_list.gifs
-            break
-        except errors.FloodWaitError as flood:
-            logger.warning(flood)
-            ui.message(flood)
-            ui.cooldown(flood)
-            await asyncio.sleep(flood.seconds)
-            ui.uncooldown()
+    faved_stickers = await get_faved_stickers(sender)
+    stickers = await get_stickers(sender)
+    stickers_archived = await get_archived(sender, False)
+    emojis = await get_emojis(sender)
+    emojis_archived = await get_archived(sender, True)
+    gifs = await get_gifs(sender)
+
+    # Наборы, стикеры и гифки, которые у получателя уже есть
+    r_stickers = await get_stickers(recepient)
+    r_emojis = await get_emojis(recepient)
+    installed: set[int] = {
+        *(sticker_set.id for sticker_set in r_stickers),
+        *(sticker_set.id for sticker_set in r_emojis),
+        *(covered.set.id for covered in await get_archived(recepient, False)),
+        *(covered.set.id for covered in await get_archived(recepient, True)),
+    }
+    r_faved_stickers: set[int] = {
+        sticker.id for sticker in await get_faved_stickers(recepient)
+    }
+    # Загруженная копия гифки получает новый id, поэтому сравниваем
+    # по размеру и типу файла.
+    r_gifs: set[tuple[int, str]] = {
+        (gif.size, gif.mime_type) for gif in await get_gifs(recepient)
+    }
+
+    faved_stickers = [
+        sticker for sticker in faved_stickers
+        if sticker.id not in r_faved_stickers
+    ]
+    stickers_order, emojis_order = stickers, emojis
+    stickers = [
+        sticker for sticker in stickers if not is_already_have(sticker)
+    ]
+    stickers_archived = [
+        sticker for sticker in stickers_archived
+        if not is_already_have(sticker.set)
+    ]
+    emojis = [emoji for emoji in emojis if not is_already_have(emoji)]
+    emojis_archived = [
+        emoji for emoji in emojis_archived if not is_already_have(emoji.set)
+    ]
+    gifs = [gif for gif in gifs if (gif.size, gif.mime_type) not in r_gifs]
 
     ui.total = len(faved_stickers) + len(stickers) + len(stickers_archived) \
             + len(emojis) + len(emojis_archived) + len(gifs)
     ui.progress_counters.visible = True
-    timeout = 5
+
+    async def install(sticker_set: types.StickerSet, archived: bool) -> None:
+        await execute(
+            recepient,
+            messages.InstallStickerSetRequest(
+                stickerset=types.InputStickerSetID(
+                    id=sticker_set.id,
+                    access_hash=sticker_set.access_hash
+                ),
+                archived=archived
+            ),
+            ui
+        )
+        installed.add(sticker_set.id)
+        ui.value += 1
+
+    async def reorder(
+        source: list[types.StickerSet],
+        present: list[types.StickerSet],
+        emojis: bool
+    ) -> None:
+        """Put the sets in the sender's order, other sets go after them."""
+        order = [
+            sticker_set.id for sticker_set in source
+            if sticker_set.id in installed
+        ]
+        ordered = set(order)
+        order.extend(
+            sticker_set.id for sticker_set in present
+            if sticker_set.id not in ordered
+        )
+        if order:
+            await execute(
+                recepient,
+                messages.ReorderStickerSetsRequest(order=order, emojis=emojis),
+                ui
+            )
 
     if faved_stickers:
         for sticker in reversed(faved_stickers):
-            while True:
-                try:
-                    await asyncio.sleep(timeout)
-                    await recepient(
-                        messages.FaveStickerRequest(
-                            id=types.InputDocument(
-                                id=sticker.id,
-                                access_hash=sticker.access_hash,
-                                file_reference=sticker.file_reference
-                            ),
-                            unfave=False
-                        )
-                    )
-                    ui.value += 1
-                    break
-                except errors.StickerIdInvalidError as error:
-                    logger.warning(error)
-                    ui.message(error, True)
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
-    if stickers:
-        for sticker in reversed(stickers):
-            while True:
-                try:
-                    await asyncio.sleep(timeout)
-                    await recepient(
-                        messages.InstallStickerSetRequest(
-                            stickerset=types.InputStickerSetShortName(
-                                sticker.short_name
-                            ),
-                            archived=False
-                        )
-                    )
-                    ui.value += 1
-                    break
-                except errors.StickersetInvalidError as error:
-                    logger.warning(error)
-                    ui.message(error, True)
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
-
-    if stickers_archived:
-        for sticker in reversed(stickers_archived):
-            while True:
-                try:
-                    await asyncio.sleep(timeout)
-                    await recepient(
-                        messages.InstallStickerSetRequest(
-                            stickerset=types.InputStickerSetShortName(
-                                sticker.set.short_name
-                            ),
-                            archived=True
-                        )
-                    )
-                    ui.value += 1
-                    break
-                except errors.StickersetInvalidError as error:
-                    logger.warning(error)
-                    ui.message(error, True)
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
+            try:
+                await execute(
+                    recepient,
+                    messages.FaveStickerRequest(
+                        id=types.InputDocument(
+                            id=sticker.id,
+                            access_hash=sticker.access_hash,
+                            file_reference=sticker.file_reference
+                        ),
+                        unfave=False
+                    ),
+                    ui
+                )
+                ui.value += 1
+            except errors.StickerIdInvalidError as error:
+                logger.warning(error)
+                ui.message(error, True)
 
+    # Наборы ставятся одновременно в пределах лимита запросов, порядок
+    # восстанавливается одним запросом в конце. Ошибка одного набора не
+    # прерывает остальные, все установки завершаются до выхода.
+    queued: list[tuple[types.StickerSet, bool]] = [
+        *((sticker, False) for sticker in stickers),
+        *((sticker.set, True) for sticker in stickers_archived),
+        *((emoji, False) for emoji in emojis),
+        *((emoji.set, True) for emoji in emojis_archived)
+    ]
+    results = await asyncio.gather(
+        *(install(sticker_set, archived) for sticker_set, archived in queued),
+        return_exceptions=True
+    )
+    for (sticker_set, _), result in zip(queued, results):
+        if isinstance(result, Exception):
+            logger.warning(f"{sticker_set.short_name}: {result}")
+            ui.message(f"Unable to install {sticker_set.title}: {result}", True)
+    if stickers:
+        await reorder(stickers_order, r_stickers, False)
     if emojis:
-        for emoji in reversed(emojis):
-            while True:
-                try:
-                    await asyncio.sleep(timeout)
-                    await recepient(
-                        messages.InstallStickerSetRequest(
-                            stickerset=types.InputStickerSetShortName(
-                                emoji.short_name
-                            ),
-                            archived=False
-                        )
-                    )
-                    ui.value += 1
-                    break
-                except errors.StickersetInvalidError as error:
-                    logger.warning(error)
-                    ui.message(error, True)
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
+        await reorder(emojis_order, r_emojis, True)
 
-    if emojis_archived:
-        for emoji in reversed(emojis_archived):
-            while True:
-                try:
-                    await asyncio.sleep(timeout)
-                    await recepient(
-                        messages.InstallStickerSetRequest(
-                            stickerset=types.InputStickerSetShortName(
-                                emoji.set.short_name
-                            ),
-                            archived=True
-                        )
-                    )
-                    ui.value += 1
-                    break
-                except errors.StickersetInvalidError as error:
-                    logger.warning(error)
-                    ui.message(error, True)
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
+    async def upload_gif(gif: types.Document) -> types.MessageMediaDocument:
+        upload = await transfer(sender, recepient, gif, "gif.mp4", ui)
+        media = (await recepient._file_to_media(upload))[1]
+        return await execute(
+            recepient, messages.UploadMediaRequest('me', media), ui
+        )
 
-    if gifs:
-        timeout_gif = 1 if len(gifs) < 50 else 2 if 20 < len(gifs) < 50 else 3.5
-        for gif in reversed(gifs):
-            while True:
-                try:
-                    request = await sender.download_file(gif, bytes)
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout_gif += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
+    async def save_gif(x: types.MessageMediaDocument) -> None:
+        try:
+            await execute(
+                recepient,
+                messages.SaveGifRequest(
+                    types.InputDocument(
+                        id=x.document.id,
+                        access_hash=x.document.access_hash,
+                        file_reference=x.document.file_reference
+                    ),
+                    unsave=False
+                ),
+                ui
+            )
+            ui.value += 1
+        except errors.FileReferenceExpiredError as error:
+            logger.error(error)
+            ui.message(error, True)
 
-            while True:
-                try:
-                    await asyncio.sleep(timeout_gif)
-                    upload = await recepient.upload_file(
-                        request, file_name="gif.mp4"
-                    )
-                    media = (await recepient._file_to_media(upload))[1]
-                    x: types.MessageMediaDocument = await recepient(
-                    messages.UploadMediaRequest('me', media)
-                    )
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout_gif += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
+    # До WORKERS гифок скачиваются и загружаются одновременно, а
+    # сохраняются строго в исходном порядке.
+    items = iter(reversed(gifs))
+    pending: deque[asyncio.Task] = deque()
 
-            while True:
-                try:
-                    await recepient(
-                        messages.SaveGifRequest(
-                            types.InputDocument(
-                                id=x.document.id,
-                                access_hash=x.document.access_hash,
-                                file_reference=x.document.file_reference
-                            ),
-                            unsave=False
-                        )
-                    )
-                    ui.value += 1
-                    break
-                except errors.FileReferenceExpiredError as error:
-                    logger.error(error)
-                    ui.message(error, True)
-                    break
-                except errors.FloodWaitError as flood:
-                    logger.warning(flood)
-                    ui.message(flood)
-                    ui.cooldown(flood)
-                    timeout_gif += 5
-                    await asyncio.sleep(flood.seconds)
-                    ui.uncooldown()
+    def schedule() -> None:
+        for gif in islice(items, WORKERS - len(pending)):
+            pending.append(asyncio.create_task(upload_gif(gif)))
 
+    try:
+        schedule()
+        while pending:
+            task = pending.popleft()
+            schedule()
+            await save_gif(await task)
+    finally:
+        for task in pending:
+            task.cancel()
 
     ui.success()
@@ -0,0 +1,84 @@
+from functools import partial
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO
+
+from telethon.tl import types
+
+from .cache import MediaCache
+from .executor import execute
+from ..components import Task
+from ..telegram import UserClient
+
+WINDOW = 4 * 1024 * 1024 # байт в памяти, остальное сбрасывается на диск
+
+cache = MediaCache()
+
+
+async def download(
+    client: UserClient,
+    media: types.Photo | types.Document,
+    file: BinaryIO,
+    ui: Task
+) -> int:
+    """Download media into the file part by part and return its size."""
+    async def write() -> None:
+        file.seek(0)
+        file.truncate()
+        await client.download_media(media, file)
+
+    await execute(client, write, ui)
+    size = file.tell()
+    file.seek(0)
+    return size
+
+
+async def spool(
+    client: UserClient,
+    media: types.Photo | types.Document,
+    ui: Task,
+    window: int = WINDOW
+) -> tuple[BinaryIO, int]:
+    """
+    Open media from the cache or download it into a new spooled file and
+    cache it. The caller must close the file.
+    """
+    cached = cache.open(media)
+    if cached is not None:
+        return cached
+    file = SpooledTemporaryFile(max_size=window)
+    try:
+        size = await download(client, media, file, ui)
+        await cache.store(media, file)
+    except BaseException:
+        file.close()
+        raise
+    return file, size
+
+
+async def upload(
+    client: UserClient, file: BinaryIO, size: int, name: str, ui: Task
+) -> types.InputFile | types.InputFileBig:
+    """Upload the downloaded file part by part."""
+    return await execute(
+        client,
+        partial(client.upload_file, file, file_size=size, file_name=name),
+        ui
+    )
+
+
+async def transfer(
+    sender: UserClient,
+    recepient: UserClient,
+    media: types.Photo | types.Document,
+    name: str,
+    ui: Task,
+    window: int = WINDOW
+) -> types.InputFile | types.InputFileBig:
+    """
+    Move media from the sender to the recepient. Parts are written to a
+    spooled file, so at most <window> bytes are kept in memory whatever
+    the size of the file is.
+    """
+    file, size = await spool(sender, media, ui, window)
+    with file:
+        return await upload(recepient, file, size, name, ui)
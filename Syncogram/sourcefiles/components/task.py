@@ -1,7 +1,7 @@
 """Custom task container for view in mainscreen."""
 import flet as ft
 
-from telethon.errors.rpcerrorlist import FloodWaitError
+from telethon.errors import FloodError
 
 from ..components import Timeleft
 
@@ -212,7 +212,7 @@ class Task(ft.Container):
         if bad:
             if not self.missdata_ui.visible:
                 self.missdata_ui.visible = True
-        if isinstance(message, FloodWaitError):
+        if isinstance(message, FloodError):
             message = f"{str(message)}\nLatency was increased.\nPlease wait for a pause and the program will resume working."
         self.extensive.controls.extend([
             ft.Text(value=str(message), selectable=True, size=12),
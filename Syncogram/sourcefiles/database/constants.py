@@ -142,3 +142,180 @@ WHERE options.user_id =
     SELECT user_id FROM users WHERE is_primary = 1
 )
 """
+
+SQL_TABLE_FAVORITES_IDS = \
+"""
+CREATE TABLE IF NOT EXISTS favorites_ids
+(
+    sender_id INTEGER,
+    recepient_id INTEGER,
+    old_id INTEGER,
+    new_id INTEGER,
+    PRIMARY KEY (sender_id, recepient_id, old_id)
+)
+"""
+
+SQL_TABLE_FAVORITES_BATCHES = \
+"""
+CREATE TABLE IF NOT EXISTS favorites_batches
+(
+    sender_id INTEGER,
+    recepient_id INTEGER,
+    first_id INTEGER,
+    last_id INTEGER,
+    count INTEGER
+)
+"""
+
+SQL_TABLE_FAVORITES_STAGED = \
+"""
+CREATE TABLE IF NOT EXISTS favorites_staged
+(
+    sender_id INTEGER,
+    recepient_id INTEGER,
+    message_id INTEGER,
+    PRIMARY KEY (sender_id, recepient_id, message_id)
+)
+"""
+
+SQL_TABLE_FAVORITES_MARKS = \
+"""
+CREATE TABLE IF NOT EXISTS favorites_marks
+(
+    sender_id INTEGER,
+    recepient_id INTEGER,
+    last_id INTEGER,
+    count INTEGER,
+    PRIMARY KEY (sender_id, recepient_id)
+)
+"""
+
+SQL_TABLE_FAVORITES_PINS = \
+"""
+CREATE TABLE IF NOT EXISTS favorites_pins
+(
+    sender_id INTEGER,
+    recepient_id INTEGER,
+    message_id INTEGER,
+    PRIMARY KEY (sender_id, recepient_id, message_id)
+)
+"""
+
+SQL_TABLE_FAVORITES_MEDIA = \
+"""
+CREATE TABLE IF NOT EXISTS favorites_media
+(
+    sender_id INTEGER,
+    recepient_id INTEGER,
+    media_id INTEGER,
+    size INTEGER,
+    message_id INTEGER,
+    PRIMARY KEY (sender_id, recepient_id, media_id, size)
+)
+"""
+
+SQL_TABLE_AVATARS_IDS = \
+"""
+CREATE TABLE IF NOT EXISTS avatars_ids
+(
+    sender_id INTEGER,
+    recepient_id INTEGER,
+    old_id INTEGER,
+    new_id INTEGER,
+    PRIMARY KEY (sender_id, recepient_id, old_id)
+)
+"""
+
+SQL_INSERT_FAVORITES_ID = """INSERT OR REPLACE INTO favorites_ids VALUES (?,?,?,?)"""
+SQL_INSERT_FAVORITES_BATCH = """INSERT INTO favorites_batches VALUES (?,?,?,?,?)"""
+SQL_INSERT_FAVORITES_STAGED = """INSERT OR IGNORE INTO favorites_staged VALUES (?,?,?)"""
+SQL_INSERT_FAVORITES_PIN = """INSERT OR IGNORE INTO favorites_pins VALUES (?,?,?)"""
+SQL_INSERT_FAVORITES_MEDIA = """INSERT OR IGNORE INTO favorites_media VALUES (?,?,?,?,?)"""
+SQL_INSERT_FAVORITES_MARK = """INSERT OR REPLACE INTO favorites_marks VALUES (?,?,?,?)"""
+SQL_GET_FAVORITES_MARK = """SELECT last_id, count FROM favorites_marks WHERE sender_id = ? AND recepient_id = ?"""
+SQL_GET_FAVORITES_IDS = """SELECT old_id, new_id FROM favorites_ids WHERE sender_id = ? AND recepient_id = ?"""
+SQL_GET_FAVORITES_STAGED = """SELECT message_id FROM favorites_staged WHERE sender_id = ? AND recepient_id = ?"""
+SQL_GET_FAVORITES_PINS = """SELECT message_id FROM favorites_pins WHERE sender_id = ? AND recepient_id = ? ORDER BY message_id"""
+SQL_GET_FAVORITES_MEDIA = """SELECT media_id, size, message_id FROM favorites_media WHERE sender_id = ? AND recepient_id = ?"""
+SQL_DELETE_FAVORITES_BATCHES = """DELETE FROM favorites_batches WHERE sender_id = ? AND recepient_id = ?"""
+SQL_DELETE_FAVORITES_STAGED = """DELETE FROM favorites_staged WHERE sender_id = ? AND recepient_id = ?"""
+SQL_DELETE_FAVORITES_PINS = """DELETE FROM favorites_pins WHERE sender_id = ? AND recepient_id = ?"""
+SQL_DELETE_FAVORITES_STAGED_ID = """DELETE FROM favorites_staged WHERE sender_id = ? AND recepient_id = ? AND message_id = ?"""
+
+SQL_TABLE_FAVORITES_BRIDGE = \
+"""
+CREATE TABLE IF NOT EXISTS favorites_bridge
+(
+    sender_id INTEGER,
+    recepient_id INTEGER,
+    channel_id INTEGER,
+    access_hash INTEGER,
+    PRIMARY KEY (sender_id, recepient_id, channel_id)
+)
+"""
+
+SQL_INSERT_FAVORITES_BRIDGE = """INSERT OR REPLACE INTO favorites_bridge VALUES (?,?,?,?)"""
+SQL_GET_FAVORITES_BRIDGE = """SELECT channel_id, access_hash FROM favorites_bridge WHERE sender_id = ? AND recepient_id = ?"""
+SQL_DELETE_FAVORITES_BRIDGE = """DELETE FROM favorites_bridge WHERE sender_id = ? AND recepient_id = ? AND channel_id = ?"""
+
+SQL_GET_FAVORITES_PROGRESS = \
+"""
+SELECT COALESCE(MAX(last_id), 0), COALESCE(SUM(count), 0)
+FROM favorites_batches
+WHERE sender_id = ? AND recepient_id = ?
+"""
+
+SQL_INSERT_AVATAR_ID = """INSERT OR REPLACE INTO avatars_ids VALUES (?,?,?,?)"""
+SQL_GET_AVATARS_IDS = """SELECT old_id, new_id FROM avatars_ids WHERE sender_id = ? AND recepient_id = ?"""
+
+SQL_TABLE_MEDIA_CACHE = \
+"""
+CREATE TABLE IF NOT EXISTS media_cache
+(
+    media_id INTEGER,
+    size INTEGER,
+    sha256 VARCHAR(64),
+    length INTEGER,
+    used REAL,
+    PRIMARY KEY (media_id, size)
+)
+"""
+
+SQL_GET_CACHED_MEDIA = """SELECT sha256, length FROM media_cache WHERE media_id = ? AND size = ?"""
+SQL_INSERT_CACHED_MEDIA = """INSERT OR REPLACE INTO media_cache VALUES (?,?,?,?,?)"""
+SQL_TOUCH_CACHED_MEDIA = """UPDATE media_cache SET used = ? WHERE media_id = ? AND size = ?"""
+SQL_GET_MEDIA_CACHE_SIZE = """SELECT COALESCE(SUM(length), 0) FROM media_cache"""
+SQL_GET_OLDEST_CACHED_MEDIA = """SELECT media_id, size, sha256 FROM media_cache ORDER BY used LIMIT 1"""
+SQL_DELETE_CACHED_MEDIA = """DELETE FROM media_cache WHERE media_id = ? AND size = ?"""
+SQL_COUNT_CACHED_SHA256 = """SELECT COUNT(*) FROM media_cache WHERE sha256 = ?"""
+
+SQL_TABLE_RESPONSES = \
+"""
+CREATE TABLE IF NOT EXISTS responses
+(
+    account_id INTEGER,
+    method VARCHAR(64),
+    hash INTEGER,
+    result BLOB,
+    updated REAL,
+    PRIMARY KEY (account_id, method)
+)
+"""
+
+SQL_GET_RESPONSE = """SELECT hash, result, updated FROM responses WHERE account_id = ? AND method = ?"""
+SQL_INSERT_RESPONSE = """INSERT OR REPLACE INTO responses VALUES (?,?,?,?,?)"""
+
+SQL_TABLE_PEERS = \
+"""
+CREATE TABLE IF NOT EXISTS peers
+(
+    account_id INTEGER,
+    peer_id INTEGER,
+    access_hash INTEGER,
+    PRIMARY KEY (account_id, peer_id)
+)
+"""
+
+SQL_GET_PEERS = """SELECT peer_id, access_hash FROM peers WHERE account_id = ?"""
+SQL_INSERT_PEER = """INSERT OR REPLACE INTO peers VALUES (?,?,?)"""
+SQL_DELETE_PEER = """DELETE FROM peers WHERE account_id = ? AND peer_id = ?"""
@@ -27,7 +27,51 @@ from .constants import (
     SQL_GET_DATABASE_VERSION,
     SQL_INSERT_DB_VERSION,
     SQL_UPDATE_DB_VERSION,
-    SQL_TRIGGER_DROP_OPTIONS
+    SQL_TRIGGER_DROP_OPTIONS,
+    SQL_TABLE_FAVORITES_IDS,
+    SQL_TABLE_FAVORITES_BATCHES,
+    SQL_TABLE_FAVORITES_STAGED,
+    SQL_TABLE_FAVORITES_MARKS,
+    SQL_INSERT_FAVORITES_MARK,
+    SQL_GET_FAVORITES_MARK,
+    SQL_INSERT_FAVORITES_ID,
+    SQL_INSERT_FAVORITES_BATCH,
+    SQL_INSERT_FAVORITES_STAGED,
+    SQL_GET_FAVORITES_IDS,
+    SQL_GET_FAVORITES_STAGED,
+    SQL_GET_FAVORITES_PROGRESS,
+    SQL_DELETE_FAVORITES_BATCHES,
+    SQL_DELETE_FAVORITES_STAGED,
+    SQL_DELETE_FAVORITES_STAGED_ID,
+    SQL_TABLE_FAVORITES_PINS,
+    SQL_INSERT_FAVORITES_PIN,
+    SQL_GET_FAVORITES_PINS,
+    SQL_DELETE_FAVORITES_PINS,
+    SQL_TABLE_FAVORITES_MEDIA,
+    SQL_TABLE_FAVORITES_BRIDGE,
+    SQL_INSERT_FAVORITES_BRIDGE,
+    SQL_GET_FAVORITES_BRIDGE,
+    SQL_DELETE_FAVORITES_BRIDGE,
+    SQL_INSERT_FAVORITES_MEDIA,
+    SQL_GET_FAVORITES_MEDIA,
+    SQL_TABLE_AVATARS_IDS,
+    SQL_INSERT_AVATAR_ID,
+    SQL_GET_AVATARS_IDS,
+    SQL_TABLE_MEDIA_CACHE,
+    SQL_GET_CACHED_MEDIA,
+    SQL_INSERT_CACHED_MEDIA,
+    SQL_TOUCH_CACHED_MEDIA,
+    SQL_GET_MEDIA_CACHE_SIZE,
+    SQL_GET_OLDEST_CACHED_MEDIA,
+    SQL_DELETE_CACHED_MEDIA,
+    SQL_COUNT_CACHED_SHA256,
+    SQL_TABLE_RESPONSES,
+    SQL_GET_RESPONSE,
+    SQL_INSERT_RESPONSE,
+    SQL_TABLE_PEERS,
+    SQL_GET_PEERS,
+    SQL_INSERT_PEER,
+    SQL_DELETE_PEER
 )
 
 logger = logging()
@@ -53,6 +97,17 @@ class SQLite:
         self.database.cursor().execute(SQL_TABLE_USERS).close()
         self.database.cursor().execute(SQL_TABLE_OPTIONS).close()
         self.database.cursor().execute(SQL_TRIGGER_DROP_OPTIONS).close()
+        self.database.cursor().execute(SQL_TABLE_FAVORITES_IDS).close()
+        self.database.cursor().execute(SQL_TABLE_FAVORITES_BATCHES).close()
+        self.database.cursor().execute(SQL_TABLE_FAVORITES_STAGED).close()
+        self.database.cursor().execute(SQL_TABLE_FAVORITES_MARKS).close()
+        self.database.cursor().execute(SQL_TABLE_FAVORITES_PINS).close()
+        self.database.cursor().execute(SQL_TABLE_FAVORITES_MEDIA).close()
+        self.database.cursor().execute(SQL_TABLE_FAVORITES_BRIDGE).close()
+        self.database.cursor().execute(SQL_TABLE_AVATARS_IDS).close()
+        self.database.cursor().execute(SQL_TABLE_MEDIA_CACHE).close()
+        self.database.cursor().execute(SQL_TABLE_RESPONSES).close()
+        self.database.cursor().execute(SQL_TABLE_PEERS).close()
 
     @logger.catch()
     def add_user(self, *args) -> bool | int:
@@ -197,3 +252,365 @@ class SQLite:
         else:
             from ..utils import get_local_database_version
             self.set_version(get_local_database_version())
+
+    @logger.catch()
+    def get_favorites_progress(
+        self, sender_id: int, recepient_id: int
+    ) -> tuple[int, int]:
+        """Get last committed message id and count of synced messages."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(
+                    SQL_GET_FAVORITES_PROGRESS, (sender_id, recepient_id)
+                ).fetchone()
+                return request[0], request[1]
+
+    @logger.catch()
+    def get_favorites_ids(
+        self, sender_id: int, recepient_id: int
+    ) -> dict[int, int]:
+        """Get map of sender message ids to recepient message ids."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(
+                    SQL_GET_FAVORITES_IDS, (sender_id, recepient_id)
+                ).fetchall()
+                return {old_id: new_id for old_id, new_id in request}
+
+    @logger.catch()
+    def get_favorites_staged(
+        self, sender_id: int, recepient_id: int
+    ) -> list[int]:
+        """Get ids of staging messages which were not deleted yet."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(
+                    SQL_GET_FAVORITES_STAGED, (sender_id, recepient_id)
+                ).fetchall()
+                return [row[0] for row in request]
+
+    @logger.catch()
+    def add_favorites_staged(
+        self, sender_id: int, recepient_id: int, staged: list[int]
+    ) -> None:
+        """Save ids of staging messages which must be deleted."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.executemany(
+                    SQL_INSERT_FAVORITES_STAGED,
+                    [(sender_id, recepient_id, i) for i in staged]
+                )
+
+    @logger.catch()
+    def commit_favorites_batch(
+        self,
+        sender_id: int,
+        recepient_id: int,
+        first_id: int,
+        last_id: int,
+        count: int,
+        ids: dict[int, int],
+        pins: list[int]
+    ) -> None:
+        """
+        Save the forwarded batch, its ids map and pinned messages in one
+        transaction.
+        """
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.executemany(
+                    SQL_INSERT_FAVORITES_ID,
+                    [
+                        (sender_id, recepient_id, old_id, new_id)
+                        for old_id, new_id in ids.items()
+                    ]
+                )
+                cursor.executemany(
+                    SQL_INSERT_FAVORITES_PIN,
+                    [(sender_id, recepient_id, i) for i in pins]
+                )
+                cursor.execute(
+                    SQL_INSERT_FAVORITES_BATCH,
+                    (sender_id, recepient_id, first_id, last_id, count)
+                )
+
+    @logger.catch()
+    def add_favorites_ids(
+        self, sender_id: int, recepient_id: int, ids: dict[int, int]
+    ) -> None:
+        """Save ids of messages which were mapped without forwarding."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.executemany(
+                    SQL_INSERT_FAVORITES_ID,
+                    [
+                        (sender_id, recepient_id, old_id, new_id)
+                        for old_id, new_id in ids.items()
+                    ]
+                )
+
+    @logger.catch()
+    def get_favorites_media(
+        self, sender_id: int, recepient_id: int
+    ) -> dict[tuple[int, int], int]:
+        """Get index of transferred media: file id and size to message id."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(
+                    SQL_GET_FAVORITES_MEDIA, (sender_id, recepient_id)
+                ).fetchall()
+                return {
+                    (media_id, size): message_id
+                    for media_id, size, message_id in request
+                }
+
+    @logger.catch()
+    def add_favorites_media(
+        self,
+        sender_id: int,
+        recepient_id: int,
+        media: list[tuple[int, int, int]]
+    ) -> None:
+        """Save transferred media: file id, size and message id."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.executemany(
+                    SQL_INSERT_FAVORITES_MEDIA,
+                    [(sender_id, recepient_id, *row) for row in media]
+                )
+
+    @logger.catch()
+    def get_favorites_pins(
+        self, sender_id: int, recepient_id: int
+    ) -> list[int]:
+        """Get ids of pinned sender messages in the original order."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(
+                    SQL_GET_FAVORITES_PINS, (sender_id, recepient_id)
+                ).fetchall()
+                return [row[0] for row in request]
+
+    @logger.catch()
+    def remove_favorites_staged(
+        self, sender_id: int, recepient_id: int, staged: list[int]
+    ) -> None:
+        """Forget staging messages after they were deleted."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.executemany(
+                    SQL_DELETE_FAVORITES_STAGED_ID,
+                    [(sender_id, recepient_id, i) for i in staged]
+                )
+
+    @logger.catch()
+    def get_favorites_bridges(
+        self, sender_id: int, recepient_id: int
+    ) -> list[tuple[int, int]]:
+        """Get ids and access hashes of temporary groups left by runs."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(
+                    SQL_GET_FAVORITES_BRIDGE, (sender_id, recepient_id)
+                ).fetchall()
+                return [tuple(row) for row in request]
+
+    @logger.catch()
+    def set_favorites_bridge(
+        self,
+        sender_id: int,
+        recepient_id: int,
+        channel_id: int,
+        access_hash: int
+    ) -> None:
+        """Save the temporary group before anything is staged in it."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.execute(
+                    SQL_INSERT_FAVORITES_BRIDGE,
+                    (sender_id, recepient_id, channel_id, access_hash)
+                )
+
+    @logger.catch()
+    def remove_favorites_bridge(
+        self, sender_id: int, recepient_id: int, channel_id: int
+    ) -> None:
+        """Forget the temporary group after it was deleted."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.execute(
+                    SQL_DELETE_FAVORITES_BRIDGE,
+                    (sender_id, recepient_id, channel_id)
+                )
+
+    @logger.catch()
+    def get_favorites_mark(
+        self, sender_id: int, recepient_id: int
+    ) -> tuple[int, int]:
+        """Get last synced message id and count of synced messages."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(
+                    SQL_GET_FAVORITES_MARK, (sender_id, recepient_id)
+                ).fetchone()
+                if request is not None:
+                    return request[0], request[1]
+                return 0, 0
+
+    @logger.catch()
+    def finish_favorites_journal(
+        self, sender_id: int, recepient_id: int, last_id: int, count: int
+    ) -> None:
+        """
+        Move the high-water mark to the end of the finished run and forget
+        its journal. The ids map is kept for the next incremental runs.
+        """
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.execute(
+                    SQL_INSERT_FAVORITES_MARK,
+                    (sender_id, recepient_id, last_id, count)
+                )
+                cursor.execute(
+                    SQL_DELETE_FAVORITES_BATCHES, (sender_id, recepient_id)
+                )
+                cursor.execute(
+                    SQL_DELETE_FAVORITES_STAGED, (sender_id, recepient_id)
+                )
+                cursor.execute(
+                    SQL_DELETE_FAVORITES_PINS, (sender_id, recepient_id)
+                )
+
+    @logger.catch()
+    def get_avatars_ids(
+        self, sender_id: int, recepient_id: int
+    ) -> dict[int, int]:
+        """Get map of sender avatar ids to recepient avatar ids."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(
+                    SQL_GET_AVATARS_IDS, (sender_id, recepient_id)
+                ).fetchall()
+                return {old_id: new_id for old_id, new_id in request}
+
+    @logger.catch()
+    def add_avatar_id(
+        self, sender_id: int, recepient_id: int, old_id: int, new_id: int
+    ) -> None:
+        """Save the transferred avatar."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.execute(
+                    SQL_INSERT_AVATAR_ID,
+                    (sender_id, recepient_id, old_id, new_id)
+                )
+
+    @logger.catch()
+    def get_cached_media(
+        self, media_id: int, size: int, used: float
+    ) -> tuple[str, int] | None:
+        """Get hash and length of the cached media and mark it as used."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(
+                    SQL_GET_CACHED_MEDIA, (media_id, size)
+                ).fetchone()
+                if request is None:
+                    return None
+                cursor.execute(SQL_TOUCH_CACHED_MEDIA, (used, media_id, size))
+                return request[0], request[1]
+
+    @logger.catch()
+    def add_cached_media(
+        self, media_id: int, size: int, sha256: str, length: int, used: float
+    ) -> None:
+        """Save the cached media to the index."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.execute(
+                    SQL_INSERT_CACHED_MEDIA,
+                    (media_id, size, sha256, length, used)
+                )
+
+    @logger.catch()
+    def get_media_cache_size(self) -> int:
+        """Get total length of the cached media."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                return cursor.execute(SQL_GET_MEDIA_CACHE_SIZE).fetchone()[0]
+
+    @logger.catch()
+    def pop_cached_media(self) -> tuple[str, bool] | None:
+        """
+        Forget the least recently used media. Return its hash and whether
+        the file is not referenced anymore.
+        """
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(SQL_GET_OLDEST_CACHED_MEDIA).fetchone()
+                if request is None:
+                    return None
+                media_id, size, sha256 = request
+                cursor.execute(SQL_DELETE_CACHED_MEDIA, (media_id, size))
+                count = cursor.execute(
+                    SQL_COUNT_CACHED_SHA256, (sha256,)
+                ).fetchone()[0]
+                return sha256, not count
+
+    @logger.catch()
+    def get_response(
+        self, account_id: int, method: str
+    ) -> tuple[int, bytes, float] | None:
+        """Get hash, serialized result and time of the stored response."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(
+                    SQL_GET_RESPONSE, (account_id, method)
+                ).fetchone()
+                return tuple(request) if request is not None else None
+
+    @logger.catch()
+    def set_response(
+        self,
+        account_id: int,
+        method: str,
+        hash: int,
+        result: bytes,
+        updated: float
+    ) -> None:
+        """Store the last response of the method for the account."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.execute(
+                    SQL_INSERT_RESPONSE,
+                    (account_id, method, hash, result, updated)
+                )
+
+    @logger.catch()
+    def get_peers(self, account_id: int) -> list[tuple[int, int]]:
+        """Get peer ids with the stored access hashes of the account."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                request = cursor.execute(
+                    SQL_GET_PEERS, (account_id,)
+                ).fetchall()
+                return [tuple(row) for row in request]
+
+    @logger.catch()
+    def add_peers(
+        self, account_id: int, peers: list[tuple[int, int]]
+    ) -> None:
+        """Store the access hashes of the peers received by the account."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.executemany(
+                    SQL_INSERT_PEER,
+                    [(account_id, *peer) for peer in peers]
+                )
+
+    @logger.catch()
+    def delete_peer(self, account_id: int, peer_id: int) -> None:
+        """Forget the stored peer of the account."""
+        with self.database as connect:
+            with closing(connect.cursor()) as cursor:
+                cursor.execute(SQL_DELETE_PEER, (account_id, peer_id))
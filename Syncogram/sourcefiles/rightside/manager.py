@@ -4,6 +4,7 @@ from flet import Page
 
 from ..components import Task
 from ..database import SQLite
+from ..telegram import ClientPool
 from ..utils import logging
 from ..algorithms import algorithms
 
@@ -144,11 +145,12 @@ class Manager:
 
     @logger.catch()
     def get_coroutines(self) -> list[Callable[[Task], None]]:
-        """Return coroutines with UI objects.."""
+        """Return coroutines with UI objects sharing one client pool."""
+        pool: ClientPool = ClientPool()
         lst: list[Callable[[Task], None]] = []
         for option in self.options.values():
             if option["status"]:
-                lst.append(option["function"](option["ui"]))
+                lst.append(option["function"](option["ui"], pool=pool))
         return lst
 
     def callback(self):
@@ -1 +1,4 @@
-from .client import UserClient
\ No newline at end of file
+from .client import UserClient
+from .pool import ClientPool
+from .dialogs import DialogRecord, DialogSnapshot
+from .peers import PeerResolver, rebind
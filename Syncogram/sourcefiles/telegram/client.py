@@ -1,5 +1,6 @@
 import asyncio
 import platform
+from collections import Counter
 
 from telethon import TelegramClient
 from telethon.sessions import StringSession
@@ -12,7 +13,8 @@ from telethon.errors import (
     UsernameInvalidError,
     UsernameOccupiedError,
     PhoneNumberInvalidError,
-    PhoneCodeInvalidError
+    PhoneCodeInvalidError,
+    FloodError
     )
 from telethon import functions
 
@@ -22,6 +24,8 @@ from ..utils import logging
 from ..utils import generate_qrcode
 from ..utils import generate_username
 from .environments import API_ID, API_HASH
+from .limiter import RateLimiter
+from .peers import PeerResolver
 
 cfg = config()
 logger = logging()
@@ -40,6 +44,40 @@ class UserClient(TelegramClient):
             device_model=f"{platform.uname().system} {platform.uname().release}",
             app_version=cfg["APP"]["VERSION"],
         )
+        # Telethon sleeps on short FloodWaits by itself, so they are taken
+        # from it and handled by the limiter up to the user's threshold.
+        self.sleep_threshold: int = self.flood_sleep_threshold
+        self.flood_sleep_threshold = 0
+        self.limiter: RateLimiter = RateLimiter()
+        self.retries: Counter[str] = Counter()
+        self.peers: PeerResolver = PeerResolver(self)
+
+    async def _call(
+        self, sender, request, ordered=False, flood_sleep_threshold=None
+    ):
+        """
+        Every request waits for the limiter of its method class. Telethon
+        routes file downloads here directly, so they are limited too.
+        """
+        if flood_sleep_threshold is None:
+            flood_sleep_threshold = self.sleep_threshold
+        kind: str = self.limiter.classify(request)
+        while True:
+            await self.limiter.acquire(kind)
+            try:
+                result = await super()._call(sender, request, ordered)
+            except FloodError as flood:
+                seconds: int | None = getattr(flood, "seconds", None)
+                if seconds is None:
+                    raise
+                self.limiter.flood(kind, seconds)
+                if seconds > flood_sleep_threshold:
+                    raise
+                logger.info(f"Sleep {seconds}s on [{kind}] {flood}.")
+                await asyncio.sleep(seconds)
+                continue
+            self.limiter.success(kind)
+            return result
 
     @logger.catch()
     async def set_random_username(self, user: User | InputPeerUser) -> User | InputPeerUser:
@@ -0,0 +1,117 @@
+import asyncio
+from typing import Awaitable, Callable, Iterator
+
+from telethon.tl import types
+from telethon.tl.custom.dialog import Dialog
+
+
+def kind_of(entity: types.TypeUser | types.TypeChat) -> str:
+    """Get kind of the dialog entity."""
+    if isinstance(entity, types.User):
+        return "bot" if entity.bot else "user"
+    if isinstance(entity, types.Channel):
+        return "group" if entity.megagroup else "channel"
+    return "chat"
+
+
+class DialogRecord:
+    """Compact record of a dialog: the entity and the flags of the dialog."""
+    __slots__ = (
+        "id",
+        "kind",
+        "entity",
+        "archived",
+        "pinned",
+        "notify_settings",
+        "blocked"
+    )
+
+    def __init__(
+        self,
+        entity: types.TypeUser | types.TypeChat,
+        archived: bool = False,
+        pinned: bool = False,
+        notify_settings: types.PeerNotifySettings | None = None,
+        blocked: bool = False
+    ) -> None:
+        self.id: int = entity.id
+        self.kind: str = kind_of(entity)
+        self.entity: types.TypeUser | types.TypeChat = entity
+        self.archived: bool = archived
+        self.pinned: bool = pinned
+        self.notify_settings: types.PeerNotifySettings | None = notify_settings
+        self.blocked: bool = blocked
+
+    @classmethod
+    def from_dialog(cls, dialog: Dialog) -> "DialogRecord":
+        """Project the dialog into the record."""
+        return cls(
+            dialog.entity,
+            dialog.archived,
+            dialog.pinned,
+            dialog.dialog.notify_settings
+        )
+
+
+class DialogSnapshot:
+    """
+    Dialogs of one account, fetched once per run and indexed by id and
+    by kind. Algorithms update the snapshot after their own joins and
+    blocks, so it never has to be fetched again during the run.
+    """
+    def __init__(self) -> None:
+        self.lock: asyncio.Lock = asyncio.Lock()
+        self.loaded: bool = False
+        self.by_id: dict[int, DialogRecord] = {}
+        self.by_kind: dict[str, dict[int, DialogRecord]] = {}
+
+    async def load(
+        self, fetch: Callable[[], Awaitable[list[Dialog]]]
+    ) -> "DialogSnapshot":
+        """Fetch the dialogs if the snapshot was not loaded in this run."""
+        async with self.lock:
+            if not self.loaded:
+                for dialog in await fetch():
+                    self.put(DialogRecord.from_dialog(dialog))
+                self.loaded = True
+        return self
+
+    def put(self, record: DialogRecord) -> DialogRecord:
+        """Add or replace the record."""
+        self.remove(record.id)
+        self.by_id[record.id] = record
+        self.by_kind.setdefault(record.kind, {})[record.id] = record
+        return record
+
+    def add(
+        self, entity: types.TypeUser | types.TypeChat, **flags
+    ) -> DialogRecord:
+        """Add the dialog which was joined or started locally."""
+        return self.put(DialogRecord(entity, **flags))
+
+    def remove(self, dialog_id: int) -> None:
+        """Forget the dialog."""
+        record = self.by_id.pop(dialog_id, None)
+        if record is not None:
+            self.by_kind[record.kind].pop(dialog_id, None)
+
+    def block(self, user_id: int) -> None:
+        """Mark the dialog with the user as blocked."""
+        record = self.by_id.get(user_id)
+        if record is not None:
+            record.blocked = True
+
+    def get(self, dialog_id: int) -> DialogRecord | None:
+        """Get the record by id."""
+        return self.by_id.get(dialog_id)
+
+    def kinds(self, *kinds: str) -> Iterator[DialogRecord]:
+        """Iterate over records of the kinds."""
+        for kind in kinds:
+            yield from self.by_kind.get(kind, {}).values()
+
+    def __contains__(self, dialog_id: int) -> bool:
+        return dialog_id in self.by_id
+
+    def __iter__(self) -> Iterator[DialogRecord]:
+        return iter(self.by_id.values())
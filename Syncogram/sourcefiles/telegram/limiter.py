@@ -0,0 +1,149 @@
+import time
+import asyncio
+
+from telethon.tl.functions import (
+    channels,
+    chatlists,
+    contacts,
+    messages,
+    photos,
+    upload,
+)
+
+from ..utils import logging
+
+logger = logging()
+
+# Method class: (start rate, minimal rate, maximal rate, burst). Rates are
+# requests per second, the rate grows by the minimal rate after each
+# successful request and is multiplied by BACKOFF after each FloodWait.
+LIMITS: dict[str, tuple[float, float, float, int]] = {
+    "join": (0.1, 0.02, 0.5, 1),
+    "invite": (0.2, 0.02, 1, 1),
+    "resolve": (0.2, 0.02, 1, 1),
+    "forward": (0.5, 0.05, 2, 2),
+    "send": (0.5, 0.05, 2, 2),
+    "history": (1, 0.1, 5, 3),
+    "contacts": (0.4, 0.05, 2, 2),
+    "stickers": (0.5, 0.05, 3, 2),
+    "photos": (0.3, 0.05, 1, 1),
+    "upload": (20, 2, 50, 20),
+    "download": (20, 2, 50, 20),
+    "default": (1, 0.1, 5, 5),
+}
+BACKOFF = 0.5
+
+METHODS: dict[type, str] = {
+    channels.JoinChannelRequest: "join",
+    messages.ImportChatInviteRequest: "join",
+    chatlists.JoinChatlistInviteRequest: "join",
+    chatlists.CheckChatlistInviteRequest: "invite",
+    messages.CheckChatInviteRequest: "invite",
+    contacts.ResolveUsernameRequest: "resolve",
+    messages.ForwardMessagesRequest: "forward",
+    messages.SendMessageRequest: "send",
+    messages.SendMediaRequest: "send",
+    messages.SendMultiMediaRequest: "send",
+    messages.UpdatePinnedMessageRequest: "send",
+    messages.GetHistoryRequest: "history",
+    messages.GetMessagesRequest: "history",
+    messages.GetDialogsRequest: "history",
+    channels.GetMessagesRequest: "history",
+    contacts.AddContactRequest: "contacts",
+    contacts.BlockRequest: "contacts",
+    messages.InstallStickerSetRequest: "stickers",
+    messages.ReorderStickerSetsRequest: "stickers",
+    messages.FaveStickerRequest: "stickers",
+    messages.SaveGifRequest: "stickers",
+    messages.UploadMediaRequest: "stickers",
+    photos.UploadProfilePhotoRequest: "photos",
+    upload.SaveFilePartRequest: "upload",
+    upload.SaveBigFilePartRequest: "upload",
+    upload.GetFileRequest: "download",
+    upload.GetCdnFileRequest: "download",
+}
+
+
+class TokenBucket:
+    """Token bucket with additive increase and multiplicative decrease."""
+    def __init__(
+        self, rate: float, minimum: float, maximum: float, capacity: int
+    ) -> None:
+        self.rate: float = rate
+        self.minimum: float = minimum
+        self.maximum: float = maximum
+        self.capacity: int = capacity
+        self.tokens: float = capacity
+        self.updated: float = time.monotonic()
+        self.blocked_until: float = 0
+        self.lock: asyncio.Lock = asyncio.Lock()
+
+    def refill(self) -> None:
+        """Add the tokens earned since the last refill."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def success(self) -> None:
+        """Additive increase of the rate."""
+        self.rate = min(self.maximum, self.rate + self.minimum)
+
+    def flood(self, seconds: int) -> None:
+        """Multiplicative decrease of the rate and block for the pause."""
+        self.rate = max(self.minimum, self.rate * BACKOFF)
+        self.tokens = 0
+        self.updated = time.monotonic()
+        self.blocked_until = max(self.blocked_until, self.updated + seconds)
+
+
+class RateLimiter:
+    """The limiter of one account, a token bucket per method class."""
+    def __init__(self) -> None:
+        self.buckets: dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def classify(request) -> str:
+        """Get the method class of the request."""
+        if isinstance(request, (list, tuple)):
+            request = request[0] if request else None
+        return METHODS.get(type(request), "default")
+
+    def bucket(self, kind: str) -> TokenBucket:
+        """Get or create the bucket of the method class."""
+        if kind not in self.buckets:
+            self.buckets[kind] = TokenBucket(
+                *LIMITS.get(kind, LIMITS["default"])
+            )
+        return self.buckets[kind]
+
+    async def acquire(self, kind: str) -> None:
+        """Wait for the permission to send a request of the class."""
+        await self.bucket(kind).acquire()
+
+    def success(self, kind: str) -> None:
+        """Report a successful request."""
+        self.bucket(kind).success()
+
+    def flood(self, kind: str, seconds: int) -> None:
+        """Report a FloodWait received for the class."""
+        bucket = self.bucket(kind)
+        bucket.flood(seconds)
+        logger.warning(
+            f"Rate of [{kind}] requests decreased to {bucket.rate:.3f}/s."
+        )
@@ -0,0 +1,132 @@
+import asyncio
+from copy import copy
+from typing import TYPE_CHECKING
+
+from telethon import errors, utils
+from telethon.tl import types
+from telethon.tl.functions import contacts
+
+from ..database import SQLite
+from ..utils import logging
+
+if TYPE_CHECKING:
+    from .client import UserClient
+
+logger = logging()
+
+TypeHandle = types.InputPeerUser | types.InputPeerChannel
+
+
+def usernames_of(entity: types.TypeUser | types.TypeChat) -> list[str]:
+    """Get all usernames of the entity in lower case."""
+    names = [entity.username] if getattr(entity, "username", None) else []
+    names.extend(
+        name.username for name in getattr(entity, "usernames", None) or []
+    )
+    return list(dict.fromkeys(name.lower() for name in names))
+
+
+def rebind(
+    entity: types.TypeUser | types.TypeChat, handle: TypeHandle
+) -> types.TypeUser | types.TypeChat:
+    """Copy the entity of another account with the handle's access hash."""
+    entity = copy(entity)
+    entity.access_hash = handle.access_hash
+    return entity
+
+
+class PeerResolver:
+    """
+    InputPeer handles of one account keyed by peer ids. A peer is resolved
+    by its username once, the handle is kept for the run and stored in the
+    database for the next runs. Usernames are only used to find the peer:
+    they can be freed and taken by another one, ids never change. An
+    access hash is valid only for the account which received it, so the
+    handles of the accounts are never mixed.
+    """
+    def __init__(self, client: "UserClient") -> None:
+        self.client: "UserClient" = client
+        self.database: SQLite = SQLite()
+        self.lock: asyncio.Lock = asyncio.Lock()
+        self.owner: int | None = None
+        self.handles: dict[int, TypeHandle] = {}
+        self.pending: list[tuple[int, int]] = []
+
+    async def load(self) -> int:
+        """Read the stored handles of the account once per run."""
+        async with self.lock:
+            if self.owner is None:
+                me: types.InputPeerUser = await self.client.get_me(
+                    input_peer=True
+                )
+                for peer_id, access_hash in \
+                        self.database.get_peers(me.user_id) or []:
+                    real_id, peer_type = utils.resolve_id(peer_id)
+                    handle = types.InputPeerChannel \
+                        if peer_type is types.PeerChannel \
+                        else types.InputPeerUser
+                    self.handles.setdefault(
+                        peer_id, handle(real_id, access_hash)
+                    )
+                self.owner = me.user_id
+                if self.pending:
+                    self.database.add_peers(self.owner, self.pending)
+                    self.pending = []
+        return self.owner
+
+    def remember(self, *entities: types.TypeUser | types.TypeChat) -> None:
+        """
+        Keep the handles of entities received by the account itself,
+        e.g. in the result of a join, so they are not resolved again.
+        """
+        rows: list[tuple[int, int]] = []
+        for entity in entities:
+            if not isinstance(entity, (types.User, types.Channel)) \
+                    or entity.min or entity.access_hash is None:
+                continue
+            peer_id = utils.get_peer_id(entity)
+            self.handles[peer_id] = utils.get_input_peer(entity)
+            rows.append((peer_id, entity.access_hash))
+        if self.owner is None:
+            self.pending.extend(rows)
+        elif rows:
+            self.database.add_peers(self.owner, rows)
+
+    def forget(self, entity: types.TypeUser | types.TypeChat) -> None:
+        """Drop the handle which was rejected by Telegram."""
+        peer_id = utils.get_peer_id(entity)
+        self.handles.pop(peer_id, None)
+        if self.owner is not None:
+            self.database.delete_peer(self.owner, peer_id)
+
+    async def resolve(
+        self, entity: types.TypeUser | types.TypeChat
+    ) -> TypeHandle | None:
+        """
+        Get the handle of the entity of another account. None is returned
+        if no username of the entity leads to the same peer any more.
+        """
+        peer_id = utils.get_peer_id(entity)
+        await self.load()
+        if peer_id in self.handles:
+            return self.handles[peer_id]
+        for username in usernames_of(entity):
+            try:
+                resolved: types.contacts.ResolvedPeer = await self.client(
+                    contacts.ResolveUsernameRequest(username)
+                )
+            except (
+                errors.UsernameNotOccupiedError,
+                errors.UsernameInvalidError
+            ) as error:
+                logger.warning(f"@{username}: {error}")
+                continue
+            found = [
+                x for x in resolved.users + resolved.chats
+                if utils.get_peer_id(x) == peer_id
+            ]
+            if found:
+                self.remember(*found)
+                return self.handles.get(peer_id)
+            logger.warning(f"@{username} belongs to another peer now.")
+        return None
@@ -0,0 +1,70 @@
+import asyncio
+
+from ..database import SQLite
+from ..utils import logging
+from .client import UserClient
+from .dialogs import DialogSnapshot
+
+logger = logging()
+
+
+class ClientPool:
+    """
+    Per-run pool of the sender and recepient clients. Every task of one run
+    shares the same connected pair and the dialog snapshots of both
+    accounts, the connection is closed when the last task releases it.
+    """
+    def __init__(self) -> None:
+        self.database: SQLite = SQLite()
+        self.lock: asyncio.Lock = asyncio.Lock()
+        self.references: int = 0
+        self.sender: UserClient | None = None
+        self.recepient: UserClient | None = None
+        self.snapshots: tuple[DialogSnapshot, DialogSnapshot] = (
+            DialogSnapshot(), DialogSnapshot()
+        )
+
+    async def acquire(self) -> tuple[UserClient, UserClient]:
+        """Take a reference and return the connected pair of clients."""
+        self.references += 1
+        try:
+            async with self.lock:
+                if self.sender is None or self.recepient is None:
+                    self.sender = UserClient(
+                        self.database.get_session_by_status(1)
+                    )
+                    self.recepient = UserClient(
+                        self.database.get_session_by_status(0)
+                    )
+                    logger.info("Client pool opens new connections.")
+                if not self.sender.is_connected():
+                    await self.sender.connect()
+                if not self.recepient.is_connected():
+                    await self.recepient.connect()
+        except BaseException:
+            await self.release()
+            raise
+        return self.sender, self.recepient
+
+    async def release(self) -> None:
+        """Drop a reference, the last one disconnects the clients."""
+        self.references -= 1
+        if self.references <= 0:
+            await self.close()
+
+    async def close(self) -> None:
+        """Disconnect both clients regardless of the references."""
+        async with self.lock:
+            clients = (self.sender, self.recepient)
+            self.sender = None
+            self.recepient = None
+            self.references = 0
+            self.snapshots = (DialogSnapshot(), DialogSnapshot())
+        for client in clients:
+            if client is None:
+                continue
+            if client.retries:
+                logger.info(f"Retries of the run: {dict(client.retries)}")
+            if client.is_connected():
+                await client.disconnect()
+        logger.info("Client pool was closed.")
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+from types import ModuleType
+
+# Рабочая папка приложения создаётся при импорте, тесты не трогают настоящую
+os.environ["HOME"] = tempfile.mkdtemp(prefix="syncogram-tests-")
+
+# environments.py создаётся из секретов при сборке, тестам ключи не нужны
+environments = ModuleType("Syncogram.sourcefiles.telegram.environments")
+environments.API_ID = 1
+environments.API_HASH = "0"
+sys.modules.setdefault(environments.__name__, environments)
@@ -0,0 +1,34 @@
+import asyncio
+import io
+import threading
+from hashlib import sha256
+
+from telethon.tl import types
+
+from Syncogram.sourcefiles.algorithms.cache import MediaCache
+
+
+def test_store_copies_the_file_outside_of_the_event_loop(monkeypatch):
+    cache = MediaCache()
+    data = b"media" * 100_000
+    file = io.BytesIO(data)
+    media = types.Document(
+        id=31337, access_hash=0, file_reference=b"", date=None,
+        mime_type="video/mp4", size=len(data), dc_id=1, attributes=[]
+    )
+    threads = []
+    copy = cache.copy
+
+    def spy(file):
+        threads.append(threading.current_thread())
+        return copy(file)
+
+    monkeypatch.setattr(cache, "copy", spy)
+    asyncio.run(cache.store(media, file))
+
+    assert threads and threads[0] is not threading.main_thread()
+    assert file.tell() == 0
+    cached, length = cache.open(media)
+    with cached:
+        assert length == len(data)
+        assert sha256(cached.read()).digest() == sha256(data).digest()
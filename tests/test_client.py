@@ -0,0 +1,112 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from telethon.errors import FloodPremiumWaitError, FloodWaitError
+from telethon.tl.functions import messages, upload
+from telethon.tl import types
+
+from Syncogram.sourcefiles.algorithms import executor
+from Syncogram.sourcefiles.telegram import UserClient
+
+
+class FakeSender:
+    """Sender which answers with FloodWait before the result."""
+    def __init__(self, floods: list[int], result, error=FloodWaitError):
+        self.floods = floods
+        self.error = error
+        self.result = result
+        self.sent = 0
+
+    def send(self, request, ordered=False):
+        self.sent += 1
+        future = asyncio.get_running_loop().create_future()
+        if self.floods:
+            future.set_exception(
+                self.error(request=request, capture=self.floods.pop(0))
+            )
+        else:
+            future.set_result(self.result)
+        return future
+
+
+def client_with(sender: FakeSender) -> UserClient:
+    client = UserClient()
+    client._sender = sender
+    return client
+
+
+def test_short_flood_wait_reaches_limiter():
+    result = types.messages.DialogFilters(filters=[])
+    sender = FakeSender([1], result)
+    client = client_with(sender)
+    rate = client.limiter.bucket("default").rate
+
+    async def call():
+        return await client(messages.GetDialogFiltersRequest())
+
+    assert asyncio.run(call()) is result
+    assert sender.sent == 2
+    assert client.limiter.bucket("default").rate < rate
+
+
+def test_long_flood_wait_is_raised():
+    sender = FakeSender([120], None)
+    client = client_with(sender)
+
+    async def call():
+        try:
+            await client(messages.GetDialogFiltersRequest())
+        except FloodWaitError as flood:
+            return flood.seconds
+
+    assert asyncio.run(call()) == 120
+    assert sender.sent == 1
+
+
+def test_download_premium_flood_wait_is_slept_through():
+    result = types.upload.File(types.storage.FilePartial(), 0, b"")
+    sender = FakeSender([1], result, FloodPremiumWaitError)
+    client = UserClient()
+    rate = client.limiter.bucket("download").rate
+    request = upload.GetFileRequest(
+        types.InputPhotoFileLocation(1, 1, b"", "x"), 0, 1024
+    )
+
+    async def call():
+        # Загрузки Telethon вызывают _call напрямую, минуя __call__
+        return await client._call(sender, request)
+
+    assert asyncio.run(call()) is result
+    assert sender.sent == 2
+    assert client.limiter.bucket("download").rate < rate
+
+
+class FlakyClient:
+    """Client whose connection drops on the first request."""
+    def __init__(self) -> None:
+        self.sent = 0
+        self.retries = Counter()
+
+    async def __call__(self, request):
+        self.sent += 1
+        if self.sent == 1:
+            raise ConnectionError("Connection lost")
+        return request
+
+
+def test_transient_error_is_retried_only_for_idempotent_requests(monkeypatch):
+    monkeypatch.setattr(executor, "BACKOFF", 0)
+    request = messages.GetDialogFiltersRequest()
+
+    client = FlakyClient()
+    assert asyncio.run(executor.execute(client, request, None)) is request
+    assert client.sent == 2
+
+    client = FlakyClient()
+    with pytest.raises(ConnectionError):
+        asyncio.run(
+            executor.execute(client, request, None, idempotent=False)
+        )
+    assert client.sent == 1
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from Syncogram.sourcefiles.algorithms.sync_account_favorites import lookahead
+
+
+async def endless(calls: list[int]):
+    i = 0
+    while True:
+        calls.append(i)
+        yield i
+        i += 1
+        await asyncio.sleep(0)
+
+
+def test_lookahead_stops_reading_after_close():
+    calls: list[int] = []
+
+    async def run():
+        stream = lookahead(endless(calls), 3)
+        assert await anext(stream) == 0
+        await asyncio.sleep(0.01)
+        await stream.aclose()
+        read = len(calls)
+        await asyncio.sleep(0.01)
+        pending = [
+            task for task in asyncio.all_tasks()
+            if task is not asyncio.current_task()
+        ]
+        return read, len(calls), pending
+
+    read, after, pending = asyncio.run(run())
+    assert read == after
+    assert pending == []
+
+
+def test_lookahead_raises_error_of_the_stream():
+    async def broken():
+        yield 1
+        raise ValueError("broken page")
+
+    async def run():
+        return [item async for item in lookahead(broken(), 3)]
+
+    with pytest.raises(ValueError, match="broken page"):
+        asyncio.run(run())
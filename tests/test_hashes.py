@@ -0,0 +1,28 @@
+from telethon.tl import types
+
+from Syncogram.sourcefiles.algorithms import responses
+
+
+def test_telegram_hash_vectors():
+    assert responses.telegram_hash([]) == 0
+    assert responses.telegram_hash([1]) == 1
+    # 1 ^ 1 << 35 = 34359738369, ^ >> 4 = 36507222017, + 2
+    assert responses.telegram_hash([1, 2]) == 36507222019
+    assert responses.telegram_hash([3, 1001, 1002, 1003]) \
+        == 4774259776744390986
+    assert responses.telegram_hash([2 ** 62] * 3) == -3692803947567771648
+
+
+def test_contacts_hash_uses_saved_count_and_sorted_ids():
+    contacts = types.contacts.Contacts(
+        contacts=[
+            types.Contact(user_id=1003, mutual=False),
+            types.Contact(user_id=1001, mutual=False),
+            types.Contact(user_id=1002, mutual=True),
+        ],
+        saved_count=3,
+        users=[]
+    )
+
+    assert responses.result_hash(contacts) == 4774259776744390986
+    assert responses.result_hash(types.messages.SavedGifs(5, [])) == 5
@@ -0,0 +1,45 @@
+from Syncogram.sourcefiles.algorithms.planner import MediaIndex, Record
+
+
+def media(id: int, media_id: int = 77, size: int = 1024, **kwargs) -> Record:
+    return Record(
+        id,
+        kwargs.get("grouped_id"),
+        kwargs.get("reply_to"),
+        kwargs.get("pinned", False),
+        kwargs.get("has_text", False),
+        "MessageMediaDocument",
+        media_id,
+        size
+    )
+
+
+def test_media_is_collapsed_only_after_the_original_is_mapped():
+    index = MediaIndex({})
+
+    assert index.original(media(1)) is None
+    assert index.original(media(2)) is None
+    index.register(media(1))
+    assert index.original(media(3)) == 1
+    assert (index.skipped, index.bytes) == (1, 1024)
+
+
+def test_media_with_text_or_context_is_not_collapsed():
+    index = MediaIndex({(77, 1024): 1})
+
+    assert index.original(media(2, has_text=True)) is None
+    assert index.original(media(3, pinned=True)) is None
+    assert index.original(media(4, grouped_id=9)) is None
+    assert index.original(media(5, reply_to=1)) is None
+    assert index.original(media(6, size=2048)) is None
+    assert index.skipped == 0
+
+
+def test_restored_media_is_not_counted():
+    index = MediaIndex({(77, 1024): 1})
+    record = media(2)
+
+    index.original(record)
+    index.restore(record)
+
+    assert (index.skipped, index.bytes) == (0, 0)
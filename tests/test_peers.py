@@ -0,0 +1,48 @@
+import asyncio
+
+from telethon.tl import types
+
+from Syncogram.sourcefiles.telegram import PeerResolver
+
+
+class FakeClient:
+    """Account which resolves usernames from the prepared directory."""
+    def __init__(self, user_id: int, directory: dict[str, types.User]) -> None:
+        self.user_id = user_id
+        self.directory = directory
+        self.resolved: list[str] = []
+
+    async def get_me(self, input_peer=False):
+        return types.InputPeerUser(self.user_id, 0)
+
+    async def __call__(self, request):
+        self.resolved.append(request.username)
+        user = self.directory[request.username]
+        return types.contacts.ResolvedPeer(
+            types.PeerUser(user.id), chats=[], users=[user]
+        )
+
+
+def test_handle_is_resolved_once_and_stored():
+    bob = types.User(7, access_hash=99, username="bob")
+    client = FakeClient(2001, {"bob": bob})
+
+    async def run():
+        first = await PeerResolver(client).resolve(types.User(7, username="bob"))
+        second = await PeerResolver(client).resolve(types.User(7, username="bob"))
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == types.InputPeerUser(7, 99)
+    assert client.resolved == ["bob"]
+
+
+def test_retaken_username_is_not_used_for_another_peer():
+    mallory = types.User(8, access_hash=55, username="alice")
+    client = FakeClient(2002, {"alice": mallory})
+
+    async def run():
+        resolver = PeerResolver(client)
+        return await resolver.resolve(types.User(6, username="alice"))
+
+    assert asyncio.run(run()) is None
@@ -0,0 +1,76 @@
+from Syncogram.sourcefiles.algorithms.planner import (
+    MAX_BATCH,
+    Planner,
+    Record,
+)
+
+
+def single(id: int, reply_to: int | None = None, **kwargs) -> Record:
+    return Record(id, None, reply_to, False, True, None, **kwargs)
+
+
+def album(first: int, length: int, grouped_id: int) -> list[Record]:
+    return [
+        Record(i, grouped_id, None, False, False, "MessageMediaPhoto")
+        for i in range(first, first + length)
+    ]
+
+
+def plan(records: list[Record], mapped: dict[int, int] | None = None):
+    planner = Planner(mapped or {})
+    batches = []
+    for record in records:
+        if (batch := planner.feed(record)) is not None:
+            batches.append(batch)
+    return batches + planner.flush()
+
+
+def test_album_is_not_split_at_the_batch_limit():
+    records = [single(i) for i in range(1, 96)]
+    records += album(96, 10, grouped_id=1)
+    records += [single(i) for i in range(106, 120)]
+
+    batches = plan(records)
+
+    assert [len(batch) for batch in batches] == [95, 24]
+    assert all(len(batch) <= MAX_BATCH for batch in batches)
+    assert [r.id for r in batches[1].messages][:10] == list(range(96, 106))
+
+
+def test_full_batches_are_filled_to_the_limit():
+    batches = plan([single(i) for i in range(1, 251)])
+
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+
+
+def test_reply_chain_opens_segments_with_targets():
+    batches = plan([single(1), single(2, reply_to=1), single(3, reply_to=2)])
+
+    segments = batches[0].segments
+    assert [segment.reply_to for segment in segments] == [None, 1, 2]
+    assert [[r.id for r in s.messages] for s in segments] == [[1], [2], [3]]
+
+
+def test_reply_to_unknown_target_is_forwarded_as_plain():
+    batches = plan([single(1), single(2, reply_to=500), single(3)])
+
+    segments = batches[0].segments
+    assert len(segments) == 1
+    assert not segments[0].is_reply
+    assert [r.id for r in segments[0].messages] == [1, 2, 3]
+
+
+def test_reply_to_message_mapped_by_previous_run():
+    batches = plan([single(10, reply_to=5), single(11)], mapped={5: 50})
+
+    segments = batches[0].segments
+    assert [segment.reply_to for segment in segments] == [5, None]
+
+
+def test_reply_to_skipped_message_is_resolvable():
+    planner = Planner({})
+    planner.skip(single(1))
+    planner.feed(single(2, reply_to=1))
+
+    assert planner.flush()[0].segments[0].reply_to == 1
+
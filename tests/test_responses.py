@@ -0,0 +1,56 @@
+import asyncio
+from collections import Counter
+
+from telethon.tl import types
+from telethon.tl.functions import messages
+
+from Syncogram.sourcefiles.algorithms import responses
+
+
+class FakeClient:
+    """Client of one account which answers with the prepared result."""
+    def __init__(self, user_id: int, result) -> None:
+        self.user_id = user_id
+        self.result = result
+        self.requests = []
+        self.retries = Counter()
+
+    async def get_me(self, input_peer=False):
+        return types.InputPeerUser(self.user_id, 0)
+
+    async def __call__(self, request):
+        self.requests.append(request)
+        return self.result
+
+
+def test_unreadable_stored_response_is_requested_again():
+    method = messages.GetSavedGifsRequest.__name__
+    # Неизвестный конструктор, как после обновления слоя TL
+    responses.database.set_response(
+        1001, method, 42, b"\x01\x02\x03\x04" + bytes(8), 0
+    )
+    result = types.messages.SavedGifs(hash=7, gifs=[])
+    client = FakeClient(1001, result)
+
+    fetched = asyncio.run(
+        responses.fetch(client, messages.GetSavedGifsRequest, None)
+    )
+
+    assert fetched is result
+    assert client.requests[0].hash == 0
+    assert responses.database.get_response(1001, method)[0] == 7
+
+
+def test_stored_response_older_than_ttl_is_requested_again():
+    method = messages.GetSavedGifsRequest.__name__
+    stored = types.messages.SavedGifs(hash=7, gifs=[])
+    responses.database.set_response(1002, method, 7, bytes(stored), 0)
+    fresh = types.messages.SavedGifs(hash=8, gifs=[])
+    client = FakeClient(1002, fresh)
+
+    fetched = asyncio.run(
+        responses.fetch(client, messages.GetSavedGifsRequest, None, ttl=60)
+    )
+
+    assert fetched is fresh
+    assert client.requests[0].hash == 0